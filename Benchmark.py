@@ -0,0 +1,257 @@
+"""Headless benchmark: replays a recorded video or landmark trace through the detector and gesture logic.
+
+    python Benchmark.py --video clip.mp4 --output bench.json
+    python Benchmark.py --video clip.mp4 --save-trace clip_trace.npz
+    python Benchmark.py --trace clip_trace.npz --allocations
+    python Benchmark.py --video clip.mp4 --allocations --warmup-frames 10 --alloc-budget 1024
+
+Mouse output goes to InputModule.RecordingBackend, so no webcam or desktop session is needed.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+
+import FilterModule as flm
+import GestureModule as gm
+import InputModule as im
+
+
+class StageTimer():
+    """Per-stage latency samples, plus net and peak allocated bytes after warm-up when tracemalloc is running"""
+
+    def __init__(self, track_allocations=False, warmup=0):
+        self.track_allocations = track_allocations
+        self.warmup = warmup  # calls per stage whose allocations are not counted (buffers being created)
+        self.samples = {}
+        self.allocated = Counter()
+        self.peak = Counter()  # bytes above the starting point at the call's high-water mark, incl. temporaries
+        self.allocCalls = Counter()
+
+    def run(self, stage, fn, *args, **kwargs):
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        samples = self.samples.setdefault(stage, [])
+        if self.track_allocations and len(samples) >= self.warmup:
+            current, peak = tracemalloc.get_traced_memory()
+            self.allocated[stage] += current - before
+            self.peak[stage] += peak - before
+            self.allocCalls[stage] += 1
+        samples.append(elapsed)
+        return result
+
+    def report(self):
+        stages = {}
+        for stage, samples in self.samples.items():
+            ms = np.asarray(samples) * 1000
+            stages[stage] = {
+                "count": len(ms),
+                "mean_ms": round(float(ms.mean()), 4),
+                "p50_ms": round(float(np.percentile(ms, 50)), 4),
+                "p95_ms": round(float(np.percentile(ms, 95)), 4),
+                "p99_ms": round(float(np.percentile(ms, 99)), 4),
+                "max_ms": round(float(ms.max()), 4),
+            }
+            if self.track_allocations and self.allocCalls[stage]:
+                stages[stage]["net_alloc_bytes_per_call"] = round(self.allocated[stage] / self.allocCalls[stage], 1)
+                stages[stage]["peak_alloc_bytes_per_call"] = round(self.peak[stage] / self.allocCalls[stage], 1)
+        return stages
+
+    def over_budget(self, budget):
+        """Stages whose steady-state peak allocation per call exceeds budget bytes"""
+        return {stage: round(self.peak[stage] / calls, 1) for stage, calls in self.allocCalls.items()
+                if calls and self.peak[stage] / calls > budget}
+
+
+def video_frames(path, flip=True, max_frames=None, timer=None, size=None, start=0):
+    """Yield (timestamp, frame) from a video file; timestamps come from the file's frame rate
+
+    The same buffers are reused for every frame, so each frame must be consumed before the next.
+    size=(w, h) downscales frames, to measure a lower capture resolution with the same clip.
+    start skips that many frames first (grabbed, not decoded into an image), to resume a run.
+    """
+    import cv2
+
+    timer = timer or StageTimer()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video '{path}'")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    raw = img = small = None
+    try:
+        # Seeking with CAP_PROP_POS_FRAMES lands on keyframes for many codecs, so step frame by frame
+        while index < start and cap.grab():
+            index += 1
+        while max_frames is None or index < max_frames:
+            success, raw = timer.run("capture", cap.read, raw)
+            if not success:
+                break
+            frame = raw
+            if size is not None:
+                frame = small = timer.run("resize", cv2.resize, raw, tuple(size), dst=small,
+                                          interpolation=cv2.INTER_AREA)
+            img = timer.run("flip", cv2.flip, frame, 1, dst=img) if flip else frame
+            yield index / fps, img
+            index += 1
+    finally:
+        cap.release()
+
+
+def load_trace(path):
+    """Load a landmark trace saved with --save-trace: times (T,), landmarks (T, hands, 21, 3), width, height"""
+    data = np.load(path)
+    landmarks = data["landmarks"]
+    if landmarks.ndim == 3:
+        landmarks = landmarks[:, None]
+    return data["times"], landmarks, int(data["width"]), int(data["height"])
+
+
+def make_gestures(submit, wCam, hCam, args):
+    frameR, frameR_top = round(args.frame_margin * wCam), round(args.frame_margin_top * hCam)
+    return gm.GestureStateMachine(submit, wCam, hCam, frameR, frameR_top,
+                                  args.screen[0], args.screen[1],
+                                  cursor_filter=flm.PointFilter(args.filter),
+                                  voter=gm.GestureVoter() if args.vote else None)
+
+
+def run_video(args, timer, submit):
+    import HandTrackingModule as htm
+
+    detector = htm.handDetector(maxHands=args.max_hands, roi=args.roi, adaptive=args.adaptive)
+    gestures = None
+    trace_times, trace_landmarks = [], []
+    shape = None
+    detected = Counter()
+
+    frames = video_frames(args.video, flip=not args.no_flip, max_frames=args.max_frames, timer=timer,
+                          size=args.resize)
+    for timestamp, img in frames:
+        if gestures is None:
+            shape = img.shape
+            gestures = make_gestures(submit, shape[1], shape[0], args)
+
+        timer.run("inference", detector.findHands, img, draw=False, now=timestamp)
+        lmList, bbox = timer.run("landmarks", detector.findPosition, img, draw=False)
+        fingers = timer.run("fingers", detector.fingersUp)
+        gesture = timer.run("gestures", gestures.update, lmList, fingers, detector.tipDistances(), timestamp,
+                            detector.handInfo())
+        detected[gesture or "none"] += 1
+
+        if args.save_trace:
+            frame_landmarks = np.full((args.max_hands, 21, 3), np.nan, dtype=np.float32)
+            frame_landmarks[:detector.handCount] = detector.lmArray[:detector.handCount]
+            trace_times.append(timestamp)
+            trace_landmarks.append(frame_landmarks)
+
+    if args.save_trace and shape is not None:
+        np.savez_compressed(args.save_trace, times=np.asarray(trace_times), landmarks=np.asarray(trace_landmarks),
+                            width=shape[1], height=shape[0])
+
+    extra = {"skip_stats": detector.skipStats} if args.adaptive else {}
+    if args.roi:
+        extra["roi_stats"] = dict(detector.roiStats, hit_rate=round(detector.roiHitRate(), 4))
+    return detected, extra
+
+
+def run_trace(args, timer, submit):
+    import HandTrackingModule as htm
+
+    times, landmarks, width, height = load_trace(args.trace)
+    detector = htm.handDetector(maxHands=landmarks.shape[1])
+    gestures = make_gestures(submit, width, height, args)
+    detected = Counter()
+    img = np.zeros((height, width, 3), dtype=np.uint8)
+
+    count = len(times) if args.max_frames is None else min(args.max_frames, len(times))
+    for i in range(count):
+        timestamp = float(times[i])
+        timer.run("load", detector.loadLandmarks, landmarks[i])
+        lmList, bbox = timer.run("landmarks", detector.findPosition, img, draw=False)
+        fingers = timer.run("fingers", detector.fingersUp)
+        gesture = timer.run("gestures", gestures.update, lmList, fingers, detector.tipDistances(), timestamp)
+        detected[gesture or "none"] += 1
+    return detected, {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded input through the virtual mouse pipeline")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="video file to run through MediaPipe")
+    source.add_argument("--trace", help="landmark trace (.npz) to run through the gesture logic only")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--max-hands", type=int, default=1)
+    parser.add_argument("--roi", action="store_true", help="enable ROI tracking mode")
+    parser.add_argument("--adaptive", action="store_true", help="enable adaptive frame skipping")
+    parser.add_argument("--no-flip", action="store_true", help="do not mirror video frames")
+    parser.add_argument("--filter", default="one_euro", help="cursor filter: one_euro, kalman or ema")
+    parser.add_argument("--vote", action="store_true", help="commit gestures by temporal k-of-n voting")
+    parser.add_argument("--screen", type=int, nargs=2, default=(1920, 1080), metavar=("W", "H"))
+    parser.add_argument("--resize", type=int, nargs=2, metavar=("W", "H"),
+                        help="with --video, downscale frames to this capture resolution")
+    parser.add_argument("--frame-margin", type=float, default=0.125, help="detection border, fraction of width")
+    parser.add_argument("--frame-margin-top", type=float, default=0.0625, help="top border, fraction of height")
+    parser.add_argument("--allocations", action="store_true", help="track allocations with tracemalloc (slower)")
+    parser.add_argument("--warmup-frames", type=int, default=30,
+                        help="frames per stage excluded from allocation counts")
+    parser.add_argument("--alloc-budget", type=int, metavar="BYTES",
+                        help="with --allocations, exit with status 1 if any stage allocates more per frame")
+    parser.add_argument("--save-trace", help="with --video, also save the landmark trace to this .npz")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    timer = StageTimer(track_allocations=args.allocations, warmup=args.warmup_frames)
+    backend = im.RecordingBackend(keep=False)
+    if args.allocations:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    if args.video:
+        detected, extra = run_video(args, timer, backend.record)
+    else:
+        detected, extra = run_trace(args, timer, backend.record)
+    wall = time.perf_counter() - start
+
+    frames = sum(detected.values())
+    report = {
+        "source": args.video or args.trace,
+        "mode": "video" if args.video else "trace",
+        "frames": frames,
+        "wall_time_s": round(wall, 4),
+        "throughput_fps": round(frames / wall, 2) if wall > 0 else 0.0,
+        "stages": timer.report(),
+        "gestures": dict(detected),
+        "actions": dict(backend.counts),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    report.update(extra)
+    if args.allocations:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["allocations"] = {"current_bytes": current, "peak_bytes": peak}
+        if args.alloc_budget is not None:
+            report["allocations"]["over_budget"] = timer.over_budget(args.alloc_budget)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    if args.allocations and report["allocations"].get("over_budget"):
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _worker(shm_name, slot_shape, slots, tasks, results, detector_kwargs):
+    """Worker process: one MediaPipe graph per camera it sees, frames read straight from shared memory"""
+    import HandTrackingModule as htm
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frames = np.ndarray((slots,) + tuple(slot_shape), dtype=np.uint8, buffer=shm.buf)
+        detectors = {}  # per camera, so MediaPipe's tracking state is not mixed between streams
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, camera, index, timestamp, h, w = task
+            detector = detectors.get(camera)
+            if detector is None:
+                detector = detectors[camera] = htm.handDetector(**detector_kwargs)
+
+            start = time.perf_counter()
+            detector.findHands(frames[slot, :h, :w], draw=False, now=timestamp)
+            hands = []
+            for hand in range(detector.handCount):
+                label, score = detector.handInfo(hand)
+                hands.append((detector.lmArray[hand].copy(), label, score))
+            results.put((slot, camera, index, timestamp, hands, time.perf_counter() - start))
+    finally:
+        shm.close()
+
+
+class TrackedHand():
+    """One hand of one camera frame with a track ID that is stable across frames"""
+    __slots__ = ("track_id", "landmarks", "label", "score")
+
+    def __init__(self, track_id, landmarks, label, score):
+        self.track_id = track_id
+        self.landmarks = landmarks  # (21, 3) pixels
+        self.label = label  # "Left" / "Right" from MediaPipe handedness
+        self.score = score
+
+
+class HandTracker():
+    """Assigns stable track IDs to the hands of one camera by nearest palm center"""
+
+    def __init__(self, max_distance=120, max_age=10):
+        self.max_distance = max_distance  # pixels a palm may move between two results
+        self.max_age = max_age  # results a track survives without a match
+        self.tracks = {}  # track_id -> [palm center, age]
+        self.next_id = 0
+
+    @staticmethod
+    def palm_center(landmarks):
+        return landmarks[[0, 5, 9, 13, 17], :2].mean(axis=0)  # wrist + MCP joints
+
+    def update(self, hands):
+        centers = [self.palm_center(landmarks) for landmarks, label, score in hands]
+        pairs = sorted((float(np.hypot(*(center - track[0]))), track_id, i)
+                       for track_id, track in self.tracks.items() for i, center in enumerate(centers))
+
+        # Greedy matching, closest pairs first
+        assigned = {}
+        used = set()
+        for distance, track_id, i in pairs:
+            if distance > self.max_distance:
+                break
+            if track_id in used or i in assigned:
+                continue
+            assigned[i] = track_id
+            used.add(track_id)
+
+        tracked = []
+        for i, (landmarks, label, score) in enumerate(hands):
+            track_id = assigned.get(i)
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+            self.tracks[track_id] = [centers[i], 0]
+            used.add(track_id)
+            tracked.append(TrackedHand(track_id, landmarks, label, score))
+
+        for track_id in list(self.tracks):
+            if track_id not in used:
+                self.tracks[track_id][1] += 1
+                if self.tracks[track_id][1] > self.max_age:
+                    del self.tracks[track_id]
+        return tracked
+
+
+class PoolResult():
+    __slots__ = ("camera", "index", "timestamp", "hands", "inference_s")
+
+    def __init__(self, camera, index, timestamp, hands, inference_s):
+        self.camera = camera
+        self.index = index
+        self.timestamp = timestamp
+        self.hands = hands  # list of TrackedHand
+        self.inference_s = inference_s
+
+
+class DetectorPool():
+    """N worker processes running MediaPipe; frames go through a shared-memory ring instead of pickling"""
+
+    def __init__(self, workers=None, frame_shape=(480, 640, 3), slots=None, max_hands=2, **detector_kwargs):
+        self.workers = workers or max(1, mp.cpu_count() - 1)
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots or 2 * self.workers
+        detector_kwargs["maxHands"] = max_hands
+
+        size = int(np.prod(self.frame_shape)) * self.slots
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.frames = np.ndarray((self.slots,) + self.frame_shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.free = list(range(self.slots))
+
+        ctx = mp.get_context("spawn")  # MediaPipe graphs must not be forked
+        self.tasks = ctx.Queue()
+        self.results = ctx.Queue()
+        self.processes = [ctx.Process(target=_worker, name=f"detector-{i}", daemon=True,
+                                      args=(self.shm.name, self.frame_shape, self.slots,
+                                            self.tasks, self.results, detector_kwargs))
+                          for i in range(self.workers)]
+        for process in self.processes:
+            process.start()
+
+        self.finished = []  # results received from the workers, not yet returned by poll()
+        self.trackers = {}
+        self.frame_index = {}
+        self.last_delivered = {}
+        self.stats = {"submitted": 0, "dropped": 0, "stale": 0, "completed": 0}
+
+    def submit(self, camera, frame, timestamp=None):
+        """Copy a frame into a free slot and queue it; returns False (frame dropped) when all slots are busy"""
+        self.collect_free_slots()
+        if not self.free:
+            self.stats["dropped"] += 1
+            return False
+        h, w = frame.shape[:2]
+        if h > self.frame_shape[0] or w > self.frame_shape[1]:
+            raise ValueError(f"frame {w}x{h} is larger than the pool's {self.frame_shape[1]}x{self.frame_shape[0]}")
+
+        slot = self.free.pop()
+        np.copyto(self.frames[slot, :h, :w], frame)
+        index = self.frame_index.get(camera, 0)
+        self.frame_index[camera] = index + 1
+        self.tasks.put((slot, camera, index, time.time() if timestamp is None else timestamp, h, w))
+        self.stats["submitted"] += 1
+        return True
+
+    def receive(self, item):
+        # Landmarks are copied out by the worker, so the slot can be reused right away
+        self.free.append(item[0])
+        self.finished.append(item[1:])
+
+    def collect_free_slots(self):
+        """Drain finished results without blocking, returning their slots to the free list"""
+        while True:
+            try:
+                self.receive(self.results.get_nowait())
+            except queue.Empty:
+                return
+
+    def poll(self, timeout=0.0):
+        """Return finished results in frame order per camera, with hands assigned to stable tracks"""
+        self.collect_free_slots()
+        if not self.finished and timeout:
+            try:
+                self.receive(self.results.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+        finished, self.finished = self.finished, []
+        delivered = []
+        for camera, index, timestamp, hands, inference_s in sorted(finished, key=lambda r: (r[0], r[1])):
+            # Workers finish out of order; an older frame than one already delivered is stale
+            if index <= self.last_delivered.get(camera, -1):
+                self.stats["stale"] += 1
+                continue
+            self.last_delivered[camera] = index
+            tracker = self.trackers.get(camera)
+            if tracker is None:
+                tracker = self.trackers[camera] = HandTracker()
+            delivered.append(PoolResult(camera, index, timestamp, tracker.update(hands), inference_s))
+            self.stats["completed"] += 1
+        return delivered
+
+    def close(self):
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.shm.close()
+        self.shm.unlink()
+
+
+def main():
+    import argparse
+    import cv2
+
+    parser = argparse.ArgumentParser(description="Run hand detection for several cameras on a process pool")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[0])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    caps = {camera: cv2.VideoCapture(camera) for camera in args.cameras}
+    pool = DetectorPool(workers=args.workers, max_hands=args.max_hands)
+    start = time.time()
+    try:
+        while time.time() - start < args.seconds:
+            for camera, cap in caps.items():
+                success, img = cap.read()
+                if success:
+                    pool.submit(camera, cv2.flip(img, 1))
+            for result in pool.poll(timeout=0.001):
+                tracks = ", ".join(f"#{hand.track_id} {hand.label}" for hand in result.hands)
+                print(f"cam {result.camera} frame {result.index}: {tracks or '-'} ({result.inference_s * 1000:.1f}ms)")
+    finally:
+        elapsed = time.time() - start
+        pool.close()
+        for cap in caps.values():
+            cap.release()
+    print(f"{pool.stats['completed'] / elapsed:.1f} results/s with {pool.workers} workers, stats: {pool.stats}")
+
+
+if __name__ == "__main__":
+    main()
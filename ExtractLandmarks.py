@@ -0,0 +1,241 @@
+"""Offline landmark extraction: runs HandTrackingModule over a directory of videos on a process pool.
+
+    python ExtractLandmarks.py clips/ landmarks/ --workers 4 --max-hands 2
+    python ExtractLandmarks.py clips/ landmarks/ --resize 320 240 --checkpoint 250
+
+Each video gets a folder in the output directory with one .npy column per field, written through
+memory maps, so a run's memory use is one decoded frame per worker however long the clips are:
+
+    time.npy       (frames,)                 seconds, from the video's frame rate
+    hands.npy      (frames,)                 number of hands detected
+    landmarks.npy  (frames, max_hands, 21, 3) pixels as in handDetector.lmArray, NaN where no hand
+    fingers.npy    (frames, max_hands, 5)    fingersUp vectors
+    bbox.npy       (frames, max_hands, 4)    x_min, y_min, x_max, y_max, -1 where no hand
+    progress.json  frames done so far; an interrupted run picks up from there
+
+Columns start at the container's frame count and grow while decoding runs on to the end of the stream,
+so they can hold spare rows past the frames done.
+
+Load a finished folder with load(path); it returns read-only memory maps cut to the frames done.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+PROGRESS_FILE = "progress.json"
+GROW_FRAMES = 1800  # rows added when a video outruns its columns (a minute at 30 FPS)
+
+
+def columns(frames, max_hands):
+    """name -> (shape, dtype, fill value) of every output column"""
+    return {
+        "time": ((frames,), np.float64, 0.0),
+        "hands": ((frames,), np.uint8, 0),
+        "landmarks": ((frames, max_hands, 21, 3), np.float32, np.nan),
+        "fingers": ((frames, max_hands, 5), np.uint8, 0),
+        "bbox": ((frames, max_hands, 4), np.int32, -1),
+    }
+
+
+def find_videos(root, extensions=VIDEO_EXTENSIONS):
+    """Video files below root, as paths relative to it, sorted"""
+    videos = []
+    for folder, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(extensions):
+                videos.append(os.path.relpath(os.path.join(folder, name), root))
+    return sorted(videos)
+
+
+def read_progress(out_dir):
+    try:
+        with open(os.path.join(out_dir, PROGRESS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_progress(out_dir, progress):
+    """Write through a temporary file, so an interrupted write never leaves a truncated progress file"""
+    path = os.path.join(out_dir, PROGRESS_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(progress, f)
+    os.replace(path + ".tmp", path)
+
+
+def open_columns(out_dir, frames, max_hands, done=None):
+    """Memory-mapped output columns; with done, existing files are reopened and cleared past that frame"""
+    arrays = {}
+    for name, (shape, dtype, fill) in columns(frames, max_hands).items():
+        path = os.path.join(out_dir, name + ".npy")
+        if done is not None:
+            arrays[name] = np.lib.format.open_memmap(path, mode="r+")
+        else:
+            arrays[name] = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        # Rows after the last checkpoint may hold partial results of an interrupted run
+        arrays[name][done or 0:] = fill
+    return arrays
+
+
+def grow_columns(out_dir, arrays, frames, max_hands):
+    """Enlarge every column to frames rows; copies each file once, so grow in large steps"""
+    for name, (shape, dtype, fill) in columns(frames, max_hands).items():
+        path = os.path.join(out_dir, name + ".npy")
+        old = arrays.pop(name)
+        grown = np.lib.format.open_memmap(path + ".tmp", mode="w+", dtype=dtype, shape=shape)
+        grown[:len(old)] = old
+        grown[len(old):] = fill
+        grown.flush()
+        del old, grown  # unmap both before the rename
+        os.replace(path + ".tmp", path)
+        arrays[name] = np.lib.format.open_memmap(path, mode="r+")
+
+
+def extract_video(task):
+    """Worker: extract one video into out_dir; returns (video, worker name, frames processed, seconds)"""
+    import cv2
+
+    import Benchmark as bm
+    import HandTrackingModule as htm
+
+    video, path, out_dir, options = task
+    start = time.perf_counter()
+    progress = read_progress(out_dir)
+    if progress is not None and progress.get("complete"):
+        return video, mp.current_process().name, 0, 0.0
+
+    # The container's frame count is only a hint: often missing (e.g. WebM) and sometimes wrong, so
+    # decoding runs to the end of the stream and the columns grow when it has more frames
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video '{path}'")
+    header_frames = max(0, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    cap.release()
+
+    max_hands = options["max_hands"]
+    resume = (progress is not None and progress.get("header_frames") == header_frames and
+              progress.get("max_hands") == max_hands)
+    done = progress["done"] if resume else 0
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = open_columns(out_dir, header_frames or GROW_FRAMES, max_hands, done if resume else None)
+    progress = {"video": video, "header_frames": header_frames, "max_hands": max_hands, "done": done,
+                "complete": False}
+
+    def checkpoint(index):
+        for array in arrays.values():
+            array.flush()
+        progress["done"] = index
+        write_progress(out_dir, progress)
+
+    # Tracking mode as in the live app; a resumed clip re-acquires the hand on its first frame
+    detector = htm.handDetector(maxHands=max_hands, detection_confidence=options["detection_confidence"],
+                                tracking_confidence=options["tracking_confidence"])
+    index = done
+    for timestamp, img in bm.video_frames(path, flip=options["flip"], size=options["resize"], start=done):
+        if index == len(arrays["time"]):
+            grow_columns(out_dir, arrays, index + GROW_FRAMES, max_hands)
+        detector.findHands(img, draw=False, now=timestamp)
+        count = detector.handCount
+        arrays["time"][index] = timestamp
+        arrays["hands"][index] = count
+        if count:
+            hands = detector.lmArray[:count]
+            arrays["landmarks"][index, :count] = hands
+            arrays["fingers"][index, :count] = detector.fingerMask[:count]
+            arrays["bbox"][index, :count, :2] = hands[:, :, :2].min(axis=1)
+            arrays["bbox"][index, :count, 2:] = hands[:, :, :2].max(axis=1)
+        index += 1
+        if index % options["checkpoint"] == 0:
+            checkpoint(index)
+
+    # Columns can be longer than the decoded frames; progress keeps the real number
+    progress["complete"] = True
+    checkpoint(index)
+    return video, mp.current_process().name, index - done, time.perf_counter() - start
+
+
+def extract_or_report(task):
+    """extract_video() plus an error message (None on success), so one bad clip does not end the batch"""
+    try:
+        return extract_video(task) + (None,)
+    except (Exception, SystemExit) as e:  # Benchmark.video_frames exits on unreadable files
+        return task[0], mp.current_process().name, 0, 0.0, f"{type(e).__name__}: {e}"
+
+
+def load(out_dir, mmap_mode="r"):
+    """Columns of one extracted video as memory maps, cut to the frames processed so far"""
+    progress = read_progress(out_dir)
+    if progress is None:
+        raise FileNotFoundError(f"No extraction in '{out_dir}'")
+    return {name: np.load(os.path.join(out_dir, name + ".npy"), mmap_mode=mmap_mode)[:progress["done"]]
+            for name in columns(0, 1)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract hand landmarks from a directory of videos")
+    parser.add_argument("videos", help="directory searched recursively for video files")
+    parser.add_argument("output", help="output directory, one folder of .npy columns per video")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count - 1)")
+    parser.add_argument("--max-hands", type=int, default=2)
+    parser.add_argument("--detection-confidence", type=float, default=0.8)
+    parser.add_argument("--tracking-confidence", type=float, default=0.8)
+    parser.add_argument("--no-flip", action="store_true", help="do not mirror frames as the live app does")
+    parser.add_argument("--resize", type=int, nargs=2, metavar=("W", "H"), help="downscale frames first")
+    parser.add_argument("--checkpoint", type=int, default=500, help="frames between progress saves")
+    parser.add_argument("--extensions", nargs="+", default=list(VIDEO_EXTENSIONS))
+    args = parser.parse_args(argv)
+
+    videos = find_videos(args.videos, tuple(ext.lower() for ext in args.extensions))
+    if not videos:
+        raise SystemExit(f"No videos found in '{args.videos}'")
+    options = {"max_hands": args.max_hands, "detection_confidence": args.detection_confidence,
+               "tracking_confidence": args.tracking_confidence, "flip": not args.no_flip,
+               "resize": args.resize, "checkpoint": max(1, args.checkpoint)}
+    tasks = [(video, os.path.join(args.videos, video), os.path.join(args.output, os.path.splitext(video)[0]),
+              options) for video in videos]
+    workers = min(args.workers or max(1, mp.cpu_count() - 1), len(tasks))
+
+    per_worker = {}  # name -> [videos, frames, busy seconds]
+    failed = []
+    start = time.perf_counter()
+    ctx = mp.get_context("spawn")  # MediaPipe graphs must not be forked
+    with ctx.Pool(workers) as pool:
+        try:
+            for video, worker, frames, seconds, error in pool.imap_unordered(extract_or_report, tasks):
+                if error is not None:
+                    failed.append(video)
+                    print(f"{worker}: {video} failed: {error}", file=sys.stderr)
+                    continue
+                stats = per_worker.setdefault(worker, [0, 0, 0.0])
+                stats[0] += 1
+                stats[1] += frames
+                stats[2] += seconds
+                if frames:
+                    print(f"{worker}: {video} {frames} frames in {seconds:.1f}s ({frames / seconds:.1f} FPS)")
+                else:
+                    print(f"{worker}: {video} already done")
+        except KeyboardInterrupt:
+            pool.terminate()
+            print("Interrupted; run the same command again to resume", file=sys.stderr)
+            sys.exit(130)
+    wall = time.perf_counter() - start
+
+    total = 0
+    for worker, (count, frames, seconds) in sorted(per_worker.items()):
+        total += frames
+        fps = frames / seconds if seconds > 0 else 0.0
+        print(f"{worker}: {count} videos, {frames} frames, {fps:.1f} FPS")
+    print(f"{total} frames from {len(videos)} videos in {wall:.1f}s ({total / wall:.1f} FPS with {workers} workers)")
+    if failed:
+        print(f"{len(failed)} videos failed: {', '.join(sorted(failed))}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+
+class EMAFilter():
+    """Exponential moving average with a time constant, so smoothing is independent of frame rate"""
+
+    def __init__(self, tau=0.2):
+        self.tau = tau  # seconds to cover ~63% of a step
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.t = None
+
+    def filter(self, x, t):
+        if self.x is None or t <= self.t:
+            self.x, self.t = x, t
+            return x
+        alpha = 1 - math.exp(-(t - self.t) / self.tau)
+        self.x += alpha * (x - self.x)
+        self.t = t
+        return self.x
+
+
+class OneEuroFilter():
+    """One Euro filter: low cutoff (no jitter) at rest, cutoff rises with speed (little lag on fast moves)"""
+
+    def __init__(self, min_cutoff=1.0, beta=0.01, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff  # Hz, smoothing of a still hand
+        self.beta = beta  # cutoff increase per unit/s of speed
+        self.d_cutoff = d_cutoff  # Hz, smoothing of the speed estimate
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.dx = 0.0
+        self.t = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        tau = 1 / (2 * math.pi * cutoff)
+        return 1 / (1 + tau / dt)
+
+    def filter(self, x, t):
+        if self.x is None or t <= self.t:
+            self.x, self.t = x, t
+            return x
+        dt = t - self.t
+        dx = (x - self.x) / dt
+        self.dx += self.alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * abs(self.dx)
+        self.x += self.alpha(cutoff, dt) * (x - self.x)
+        self.t = t
+        return self.x
+
+
+class KalmanFilter():
+    """Constant-velocity Kalman filter on one axis; state is (position, velocity)"""
+
+    def __init__(self, process_noise=5000.0, measurement_noise=20.0):
+        self.q = process_noise  # acceleration noise density (units^2/s^3)
+        self.r = measurement_noise  # measurement variance (units^2)
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.v = 0.0
+        self.p00, self.p01, self.p11 = 0.0, 0.0, 0.0
+        self.t = None
+
+    def filter(self, x, t):
+        if self.x is None or t <= self.t:
+            self.x, self.v, self.t = x, 0.0, t
+            self.p00, self.p01, self.p11 = self.r, 0.0, self.r
+            return x
+        dt = t - self.t
+        self.t = t
+
+        # Predict
+        self.x += self.v * dt
+        q = self.q
+        p00 = self.p00 + dt * (2 * self.p01 + dt * self.p11) + q * dt ** 3 / 3
+        p01 = self.p01 + dt * self.p11 + q * dt ** 2 / 2
+        p11 = self.p11 + q * dt
+
+        # Update with the measured position
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        innovation = x - self.x
+        self.x += k0 * innovation
+        self.v += k1 * innovation
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        return self.x
+
+
+FILTERS = {
+    "ema": EMAFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(kind, **params):
+    """Create a single-axis filter by name: 'ema', 'one_euro' or 'kalman'"""
+    if kind not in FILTERS:
+        raise ValueError(f"Unknown filter '{kind}', expected one of {sorted(FILTERS)}")
+    return FILTERS[kind](**params)
+
+
+class PointFilter():
+    """Filters an (x, y) point with one independent filter per axis"""
+
+    def __init__(self, kind="one_euro", **params):
+        self.kind = kind
+        self.fx = make_filter(kind, **params)
+        self.fy = make_filter(kind, **params)
+
+    def reset(self):
+        self.fx.reset()
+        self.fy.reset()
+
+    def filter(self, x, y, t):
+        return self.fx.filter(x, t), self.fy.filter(y, t)
+
+
+def filter_trace(kind, times, values, **params):
+    """Run a recorded trace through a fresh filter per column; values is (T,) or (T, D)"""
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    columns = values.reshape(len(values), -1)
+    out = np.empty_like(columns)
+    for d in range(columns.shape[1]):
+        f = make_filter(kind, **params)
+        for i in range(len(times)):
+            out[i, d] = f.filter(float(columns[i, d]), float(times[i]))
+    return out.reshape(values.shape)
@@ -0,0 +1,432 @@
+import ScreenModule as scm
+import ScrollModule as scrm
+
+# Finger indices, also the tip order of the tip distance matrix
+THUMB, INDEX, MIDDLE, RING, PINKY = range(5)
+
+
+class Gesture():
+    """Declarative gesture: required finger states, tip distance bounds, hysteresis and debounce"""
+    __slots__ = ("name", "mask", "value", "distances", "activeDistances", "hysteresis", "cooldown", "latency",
+                 "interruptible")
+
+    def __init__(self, name, up=(), down=(), distances=(), hysteresis=0.0, cooldown=0.0, latency=None,
+                 interruptible=True):
+        self.name = name
+        # Fingers not listed in up/down are "don't care"
+        self.mask = sum(1 << f for f in tuple(up) + tuple(down))
+        self.value = sum(1 << f for f in up)
+        # (finger_a, finger_b, low, high): low < distance < high, either bound may be None
+        self.distances = tuple(self._bounds(d, 0.0) for d in distances)
+        # While the gesture is active its bounds are widened, so it does not flicker at the threshold
+        self.activeDistances = tuple(self._bounds(d, hysteresis) for d in distances)
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown  # minimum seconds between two firings of the gesture's action
+        self.latency = latency  # seconds GestureVoter may delay committing it, None for the voter's default
+        # False for gestures holding state a single noisy frame must not break (drag's pressed button):
+        # a zero-latency gesture then takes over only once they lose their votes, as any other gesture
+        self.interruptible = interruptible
+
+    @staticmethod
+    def _bounds(distance, widen):
+        a, b, low, high = distance
+        low = float("-inf") if low is None else low - widen
+        high = float("inf") if high is None else high + widen
+        return a, b, low, high
+
+    def matches_fingers(self, bits):
+        return bits & self.mask == self.value
+
+
+def default_gestures(scroll_threshold=0.75, click_cooldown=0.3):
+    """Gesture table in priority order; distances in hand scales (wrist to middle MCP, ~100px at 640x480)"""
+    return [
+        # 1. CURSOR MOVEMENT - Index finger only (never delayed by temporal voting)
+        Gesture("move", up=(INDEX,), down=(THUMB, MIDDLE), latency=0.0),
+        # 2. LEFT CLICK - Index + Middle finger very close (primary click)
+        Gesture("left_click", up=(INDEX, MIDDLE), down=(THUMB, RING),
+                distances=[(INDEX, MIDDLE, None, 0.25)], hysteresis=0.03, cooldown=click_cooldown),
+        # 3. RIGHT CLICK - Thumb + Middle finger close
+        Gesture("right_click", up=(THUMB, MIDDLE),
+                distances=[(THUMB, MIDDLE, None, 0.40)], hysteresis=0.03, cooldown=click_cooldown),
+        # 4. DOUBLE CLICK - Index + Middle + Ring close together
+        Gesture("double_click", up=(INDEX, MIDDLE, RING),
+                distances=[(INDEX, MIDDLE, None, 0.30), (INDEX, RING, None, 0.30), (MIDDLE, RING, None, 0.30)],
+                hysteresis=0.03, cooldown=click_cooldown),
+        # 5. SMART SCROLL MODE - Index + Middle moderately close with deadzone control
+        Gesture("scroll", up=(INDEX, MIDDLE), down=(THUMB, RING),
+                distances=[(INDEX, MIDDLE, 0.35, scroll_threshold)], hysteresis=0.03),
+        # 6. ENHANCED DRAG MODE - Index + Thumb close (for drag and drop), not ended by a stray move frame
+        Gesture("drag", up=(THUMB, INDEX),
+                distances=[(THUMB, INDEX, None, 0.35)], hysteresis=0.05, interruptible=False),
+    ]
+
+
+class GestureEngine():
+    """Classifies frames against a gesture table; finger states index a 32-entry lookup table"""
+
+    def __init__(self, gestures):
+        self.gestures = list(gestures)
+        # For every fingersUp bitmask, the gestures it can be, in priority order
+        self.table = [tuple(g for g in self.gestures if g.matches_fingers(bits)) for bits in range(32)]
+        self.active = None
+        self.lastFired = {g.name: float("-inf") for g in self.gestures}
+
+    @staticmethod
+    def pack(fingers):
+        """fingersUp list [thumb, index, middle, ring, pinky] -> bitmask"""
+        return fingers[0] | fingers[1] << 1 | fingers[2] << 2 | fingers[3] << 3 | fingers[4] << 4
+
+    def classify(self, fingers, tip_dist):
+        """Return the first gesture whose finger states and distance predicates hold, or None"""
+        for gesture in self.table[self.pack(fingers)]:
+            bounds = gesture.activeDistances if gesture is self.active else gesture.distances
+            for a, b, low, high in bounds:
+                if not low < tip_dist[a, b] < high:
+                    break
+            else:
+                self.active = gesture
+                return gesture
+        self.active = None
+        return None
+
+    def ready(self, gesture, now):
+        """Debounce: True (and arm the timer) when the gesture's cooldown has elapsed"""
+        if now - self.lastFired[gesture.name] > gesture.cooldown:
+            self.lastFired[gesture.name] = now
+            return True
+        return False
+
+    def reset(self):
+        self.active = None
+
+
+class GestureVoter():
+    """Temporal k-of-n voting over per-frame classifications, with MediaPipe's confidence gating the votes
+
+    A gesture is committed once it won `votes` of the last `window` voting frames (fewer when its latency
+    budget is shorter than that many frame intervals) and more of them than the committed one; with a
+    budget below one frame interval (e.g. cursor movement) it commits on the first frame it wins, unless
+    the committed gesture is not interruptible and still holds `release` votes. It then stays committed
+    while it holds at least `release` of them, so single noisy frames neither fire nor end a gesture.
+    Frames with a handedness score below min_confidence, or whose handedness label flipped, abstain and
+    keep the current decision, as do frames where tracking lost the hand for less than hold_time(), so a
+    dropout in the middle of a click does not click again.
+    """
+
+    def __init__(self, window=5, votes=3, release=2, min_confidence=0.8, latency_budget=0.1):
+        self.window = window
+        self.votes = votes
+        self.release = release
+        self.min_confidence = min_confidence
+        self.latency_budget = latency_budget  # seconds, for gestures without their own latency
+        self.ring = [None] * window  # per-frame winners, None also stands for "no gesture"
+        self.counts = {}  # gesture (or None) -> votes in the ring
+        self.filled = 0
+        self.pos = 0
+        self.committed = None
+        self.interrupted = None  # gesture a zero-latency commit took over from, while it keeps its votes
+        self.resumed = False  # this frame's commit returned to the interrupted gesture
+        self.label = None
+        self.lastTime = None
+        self.frameInterval = 1 / 30  # EMA of seconds between frames
+        self.stats = {"frames": 0, "abstained": 0, "commits": 0, "overruled": 0}
+
+    def required(self, gesture):
+        """Votes needed to commit the gesture within its latency budget at the current frame rate"""
+        budget = self.latency_budget if gesture is None or gesture.latency is None else gesture.latency
+        return max(1, min(self.votes, 1 + int(budget / self.frameInterval)))
+
+    def _frame(self, now):
+        self.stats["frames"] += 1
+        if self.lastTime is not None:
+            self.frameInterval = 0.9 * self.frameInterval + 0.1 * max(1e-3, now - self.lastTime)
+        self.lastTime = now
+
+    def abstain(self, now):
+        """A frame without a vote, e.g. no hand tracked; returns the committed gesture, which it keeps"""
+        self._frame(now)
+        self.stats["abstained"] += 1
+        return self.committed
+
+    def hold_time(self):
+        """Seconds the hand may be missing before its gestures end: the voting window, or the latency budget"""
+        return max(self.window * self.frameInterval, self.latency_budget)
+
+    def update(self, gesture, now, hand=None):
+        """Add one frame's classification; hand is (label, score) from handDetector.handInfo()
+
+        Returns the committed gesture, or None.
+        """
+        self._frame(now)
+        if hand is not None:
+            label, score = hand
+            flipped = self.label is not None and label != self.label
+            self.label = label
+            if flipped or score < self.min_confidence:
+                self.stats["abstained"] += 1
+                return self.committed
+
+        # Ring buffer of the last `window` votes, with running counts
+        if self.filled == self.window:
+            old = self.ring[self.pos]
+            self.counts[old] -= 1
+        else:
+            self.filled += 1
+        self.ring[self.pos] = gesture
+        self.pos = (self.pos + 1) % self.window
+        self.counts[gesture] = self.counts.get(gesture, 0) + 1
+
+        current = self.committed
+        held = self.counts.get(current, 0)
+        best, bestVotes = current, held
+        if self.required(gesture) == 1 and (current is None or current.interruptible or held < self.release):
+            best = gesture  # no budget to wait for a second frame: winning this one commits (or keeps) it
+        else:
+            for candidate, votes in self.counts.items():
+                if votes > bestVotes and votes >= self.required(candidate):
+                    best, bestVotes = candidate, votes
+            if best is current and held < self.release and current is not None:
+                best = None  # the committed gesture lost its support and nothing else won yet
+        # A gesture interrupted by a zero-latency one (a noisy move frame in the middle of a click) resumes
+        # instead of being committed anew, so its one-shot action does not fire twice
+        if self.interrupted is not None and self.counts.get(self.interrupted, 0) < self.release:
+            self.interrupted = None
+        self.resumed = False
+        if best is not current:
+            self.resumed = best is not None and best is self.interrupted
+            self.interrupted = current if best is gesture and self.required(gesture) == 1 else None
+            self.committed = best
+            self.stats["commits"] += 1
+        if gesture is not self.committed:
+            self.stats["overruled"] += 1
+        return self.committed
+
+    def reset(self):
+        self.ring = [None] * self.window
+        self.counts = {}
+        self.filled = 0
+        self.pos = 0
+        self.committed = None
+        self.interrupted = None
+        self.resumed = False
+        self.label = None
+
+
+class GestureStateMachine():
+    """Gesture actions and click/drag/scroll state, emitting input actions through submit(kind, *args)"""
+
+    def __init__(self, submit, wCam, hCam, frameR, frameR_top, wScr, hScr, cursor_filter=None,
+                 click_cooldown=0.3, scroll_threshold=0.75, deadzone_min=40, deadzone_max=60, log=None,
+                 gestures=None, monitors=None, screen_target=None, acceleration=None,
+                 scroll_engine=None, scroll_gain=150.0, scroll_min_speed=60.0, voter=None):
+        self.submit = submit
+        self.wScr, self.hScr = wScr, hScr
+        # ScreenModule.Monitor list; a single wScr x hScr screen unless given
+        self.monitors = monitors or [scm.Monitor(0, 0, wScr, hScr)]
+        self.screen_target = screen_target  # None spans all monitors, an index or "primary" maps onto one
+        self.acceleration = acceleration  # None (linear), a power curve gamma, or a curve function
+        self.resize(wCam, hCam, frameR, frameR_top)
+        self.cursor_filter = cursor_filter
+        self.deadzone_min = deadzone_min
+        self.deadzone_max = deadzone_max
+        self.log = log or (lambda action, details="": None)
+
+        # Scroll speed in units/s: scroll_gain per % outside the deadzone, at least scroll_min_speed
+        # (150 and 60 match the former 5 and 2 units per frame at 30 FPS)
+        self.scroll_engine = scroll_engine or scrm.ScrollEngine(submit)
+        self.scroll_gain = scroll_gain
+        self.scroll_min_speed = scroll_min_speed
+        self.scroll_direction = None
+
+        self.engine = GestureEngine(gestures or default_gestures(scroll_threshold, click_cooldown))
+        # Optional GestureVoter; with it, clicks fire once per committed gesture instead of on a cooldown
+        self.voter = voter
+        self.frame_gesture = None  # this frame's own classification, before voting
+        self.committed = None
+        self.entered = False  # the committed gesture changed this frame
+        self.lastSeen = None  # timestamp of the last frame with a hand
+        self.handlers = {
+            "move": self.on_move,
+            "left_click": self.on_left_click,
+            "right_click": self.on_right_click,
+            "double_click": self.on_double_click,
+            "scroll": self.on_scroll,
+            "drag": self.on_drag,
+        }
+
+        # Drag and scroll state
+        self.drag_active = False
+        self.drag_start_pos = None
+        self.scroll_active = False
+        self.scroll_position = 50  # Start at center (50%)
+        self.scroll_result = None
+        self.click_in_progress = False
+        self.cursor = None  # last cursor target in screen coordinates
+
+    def resize(self, wCam, hCam, frameR, frameR_top):
+        """New capture size or active region, e.g. after a resolution tier switch"""
+        self.wCam, self.hCam = wCam, hCam
+        self.frameR, self.frameR_top = frameR, frameR_top
+        self.screen = scm.ScreenMapper(wCam, hCam, frameR, frameR_top, self.monitors,
+                                       self.screen_target, self.acceleration)
+        # Scroll bar mapping, precomputed like the screen mapping
+        self.scroll_y0, self.scroll_y1 = frameR_top, hCam - frameR
+        self.scroll_scale = 100 / max(1, self.scroll_y1 - self.scroll_y0)
+
+    def set_monitors(self, monitors):
+        """New display layout, e.g. from ScreenGeometry.poll()"""
+        self.monitors = list(monitors)
+        self.resize(self.wCam, self.hCam, self.frameR, self.frameR_top)
+
+    def to_screen(self, x, y):
+        """Map a point of the active region to screen coordinates"""
+        return self.screen.map(x, y)
+
+    def to_scroll_position(self, y):
+        """Map a hand Y position to scroll percentage (0-100)"""
+        return (min(max(y, self.scroll_y0), self.scroll_y1) - self.scroll_y0) * self.scroll_scale
+
+    def perform_smart_scroll(self, scroll_position, now=None):
+        """Set the scroll engine's velocity from the hand position, with deadzone and variable speed"""
+        # Check if we're in the deadzone
+        if self.deadzone_min <= scroll_position <= self.deadzone_max:
+            self.stop_scroll(now)
+            return "deadzone"  # No scrolling in deadzone
+
+        # Distance from deadzone determines speed (0% / 100% = fastest, next to the deadzone = slowest)
+        if scroll_position < self.deadzone_min:  # Scroll UP
+            direction, distance_from_center = "up", self.deadzone_min - scroll_position
+        else:  # Scroll DOWN
+            direction, distance_from_center = "down", scroll_position - self.deadzone_max
+        scroll_speed = max(self.scroll_min_speed, distance_from_center * self.scroll_gain)
+        self.scroll_engine.set_velocity(scroll_speed if direction == "up" else -scroll_speed, now)
+
+        # Log direction changes only; the engine sends the actual wheel events
+        if direction != self.scroll_direction:
+            self.scroll_direction = direction
+            self.log("SCROLL " + direction.upper(), f"Speed: {scroll_speed:.0f}/s, Pos: {scroll_position:.1f}%")
+        return direction
+
+    def stop_scroll(self, now=None):
+        self.scroll_engine.stop_scrolling(now)
+        self.scroll_direction = None
+
+    def update(self, lmList, fingers, tip_dist, now, hand=None):
+        """Classify one frame and emit its actions; returns the gesture name, or None
+
+        hand is (label, score) from handDetector.handInfo(), used by the voter to weigh the frame.
+        """
+        if not self.scroll_engine.realtime:
+            self.scroll_engine.tick(now)  # no timer thread: send scroll deltas at frame timestamps
+        if len(lmList) == 0:
+            if self.voter is not None and self.lastSeen is not None and now - self.lastSeen <= self.voter.hold_time():
+                self.hand_missing(now)
+            else:
+                self.hand_lost(now)
+            return None
+        self.lastSeen = now
+
+        self.click_in_progress = False
+        self.scroll_result = None
+        gesture = self.frame_gesture = self.engine.classify(fingers, tip_dist)
+        if self.voter is not None:
+            gesture = self.voter.update(gesture, now, hand)
+        self.entered = gesture is not self.committed and not (self.voter is not None and self.voter.resumed)
+        self.committed = gesture
+        if gesture is None:
+            self.release(now)
+            return None
+
+        if gesture.name != "drag":
+            self.release_drag()
+        if gesture.name != "scroll":
+            self.end_scroll(now)
+        self.handlers[gesture.name](gesture, lmList, now)
+        return gesture.name
+
+    def on_move(self, gesture, lmList, now):
+        x3, y3 = self.to_screen(lmList[8][1], lmList[8][2])
+        if self.cursor_filter is not None:
+            # Smoothen values using the capture timestamp, so smoothing does not depend on frame rate
+            x3, y3 = self.cursor_filter.filter(x3, y3, now)
+        self.cursor = (x3, y3)
+        self.submit("move", x3, y3)
+
+    def fire(self, gesture, now):
+        """One-shot actions: once per commit with the voter, else debounced by the gesture's cooldown"""
+        if self.voter is not None:
+            return self.entered
+        return self.engine.ready(gesture, now)
+
+    def on_left_click(self, gesture, lmList, now):
+        if self.fire(gesture, now):
+            self.submit("click", "left")
+            self.log("LEFT CLICK")
+        self.click_in_progress = True
+
+    def on_right_click(self, gesture, lmList, now):
+        if self.fire(gesture, now):
+            self.submit("click", "right")
+            self.log("RIGHT CLICK")
+        self.click_in_progress = True
+
+    def on_double_click(self, gesture, lmList, now):
+        if self.fire(gesture, now):
+            self.submit("double_click")
+            self.log("DOUBLE CLICK")
+        self.click_in_progress = True
+
+    def on_scroll(self, gesture, lmList, now):
+        # Scroll position based on hand Y position between index and middle tips
+        self.scroll_position = self.to_scroll_position((lmList[8][2] + lmList[12][2]) // 2)
+        self.scroll_result = self.perform_smart_scroll(self.scroll_position, now)
+        self.scroll_active = True
+
+    def on_drag(self, gesture, lmList, now):
+        index_tip = lmList[8][1:]
+        x3, y3 = self.to_screen(index_tip[0], index_tip[1])
+        if not self.drag_active:
+            # Move to the grab point first, then press and hold the left button
+            self.drag_active = True
+            self.drag_start_pos = (index_tip[0], index_tip[1])
+            self.submit("move", x3, y3)
+            self.submit("press", "left")
+            self.log("DRAG STARTED", f"At: {self.drag_start_pos}")
+
+        # Move cursor while dragging
+        self.cursor = (x3, y3)
+        self.submit("move", x3, y3)
+
+    def release_drag(self, details=""):
+        if self.drag_active:
+            self.drag_active = False
+            self.drag_start_pos = None
+            self.submit("release", "left")
+            self.log("DRAG ENDED" + details)
+
+    def end_scroll(self, now=None):
+        if self.scroll_active:
+            self.scroll_active = False
+            self.stop_scroll(now)
+
+    def release(self, now=None):
+        """No gesture this frame: end drag and scroll"""
+        self.release_drag()
+        self.end_scroll(now)
+
+    def hand_missing(self, now):
+        """A short tracking dropout abstains, so the committed gesture and its drag or scroll carry on"""
+        self.frame_gesture = None
+        self.click_in_progress = False
+        self.entered = False
+        self.voter.abstain(now)
+
+    def hand_lost(self, now=None):
+        self.engine.reset()
+        if self.voter is not None:
+            self.voter.reset()
+        self.frame_gesture = self.committed = None
+        self.end_scroll(now)
+        self.click_in_progress = False
+        self.release_drag(" - Hand Lost")
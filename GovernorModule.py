@@ -0,0 +1,100 @@
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+
+class Tier():
+    """One capture configuration the governor can switch to"""
+    __slots__ = ("name", "width", "height", "fps", "roi_size")
+
+    def __init__(self, name, width, height, fps, roi_size):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.fps = fps  # frames per second forwarded to inference
+        self.roi_size = roi_size  # longest side of the ROI crop fed to MediaPipe
+
+    def __repr__(self):
+        return f"{self.name} {self.width}x{self.height}@{self.fps}"
+
+
+def make_tiers(width=640, height=480, fps=30):
+    """Full, 3/4 and 1/2 resolution tiers below the given capture size, best first"""
+    return [
+        Tier("high", width, height, fps, 256),
+        Tier("medium", round(width * 0.75), round(height * 0.75), fps, 192),
+        Tier("low", width // 2, height // 2, min(fps, 24), 160),
+    ]
+
+
+def configure_camera(cap, tier):
+    """Apply a tier to a cv2.VideoCapture and return the size the driver actually chose"""
+    import cv2
+
+    # A one-frame driver buffer, so a slow loop never works through a backlog of stale frames
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, tier.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, tier.height)
+    cap.set(cv2.CAP_PROP_FPS, tier.fps)
+    return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+
+class ResolutionGovernor():
+    """Steps through capture tiers based on end-to-end latency and process CPU load
+
+    Goes one tier down as soon as the p90 latency or CPU load is over budget, and one tier up only after
+    both stayed well under budget for a whole window, so it does not oscillate between two tiers.
+    """
+
+    def __init__(self, tiers, start=0, latency_budget=0.08, cpu_budget=0.75, window=60, cooldown=3.0,
+                 headroom=0.6):
+        self.tiers = list(tiers)
+        self.index = start
+        self.latency_budget = latency_budget  # seconds, capture -> display
+        self.cpu_budget = cpu_budget  # share of all cores used by this process
+        self.window = window  # frames per decision
+        self.cooldown = cooldown  # seconds after a switch before the next decision
+        self.headroom = headroom  # step up only below this share of both budgets
+        self.latencies = deque(maxlen=window)
+        self.cores = os.cpu_count() or 1
+        self.lastSwitch = time.monotonic()
+        self.lastCpu = (time.monotonic(), time.process_time())
+        self.cpuLoad = 0.0
+        self.p90 = 0.0
+        self.switches = 0
+
+    @property
+    def tier(self):
+        return self.tiers[self.index]
+
+    def update(self, latency, now=None):
+        """Add one frame's latency; returns the new Tier when the governor switches, else None"""
+        now = time.monotonic() if now is None else now
+        self.latencies.append(latency)
+        if len(self.latencies) < self.window:
+            return None
+
+        wall, cpu = time.monotonic(), time.process_time()
+        self.cpuLoad = (cpu - self.lastCpu[1]) / max(1e-6, (wall - self.lastCpu[0]) * self.cores)
+        self.lastCpu = (wall, cpu)
+        self.p90 = float(np.percentile(self.latencies, 90))
+        self.latencies.clear()
+        if now - self.lastSwitch < self.cooldown:
+            return None
+
+        overloaded = self.p90 > self.latency_budget or self.cpuLoad > self.cpu_budget
+        idle = (self.p90 < self.latency_budget * self.headroom and
+                self.cpuLoad < self.cpu_budget * self.headroom)
+        if overloaded and self.index < len(self.tiers) - 1:
+            return self.switch(self.index + 1, now)
+        if idle and self.index > 0:
+            return self.switch(self.index - 1, now)
+        return None
+
+    def switch(self, index, now):
+        self.index = index
+        self.lastSwitch = now
+        self.switches += 1
+        return self.tier
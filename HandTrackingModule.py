@@ -1,82 +1,439 @@
-import mediapipe as mp
 import cv2
 import time
 import math
 import numpy as np
 
+mp = None  # mediapipe, imported when the first detector is built (the import alone takes seconds)
+
+
+def loadMediapipe():
+    global mp
+    if mp is None:
+        import mediapipe
+        mp = mediapipe
+    return mp
+
+
+class LandmarkList():
+    """Legacy [id, cx, cy] list view over one hand of the landmark array"""
+
+    def __init__(self, landmarks, count=0):
+        self.landmarks = landmarks  # (21, 3) float32 array, not copied
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, id):
+        if isinstance(id, slice):
+            return [self[i] for i in range(*id.indices(self.count))]
+        if id < 0:
+            id += self.count
+        if not 0 <= id < self.count:
+            raise IndexError("landmark index out of range")
+        return [id, int(self.landmarks[id, 0]), int(self.landmarks[id, 1])]
+
+    def __iter__(self):
+        for id in range(self.count):
+            yield self[id]
+
 
 class handDetector():
-    def __init__(self, mode=False, maxHands=1, detection_confidence=0.8, tracking_confidence=0.8):
+    def __init__(self, mode=False, maxHands=1, detection_confidence=0.8, tracking_confidence=0.8,
+                 roi=False, roiMargin=0.3, roiSize=256, roiMinScore=0.7,
+                 adaptive=False, maxSkip=4, maxPredictionTime=0.12, fastSpeed=6.0, cpuBudget=0.5, mirror=False):
         self.mode = mode
         self.maxHands = maxHands
         self.detection_confidence = detection_confidence
         self.tracking_confidence = tracking_confidence
 
-        self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(
-            static_image_mode=self.mode,
-            max_num_hands=self.maxHands,
-            min_detection_confidence=self.detection_confidence,
-            min_tracking_confidence=self.tracking_confidence
-        )
-        self.mpDraw = mp.solutions.drawing_utils
+        # ROI mode: run inference on a downscaled crop around the last hand bbox (first hand only)
+        self.roi = roi
+        self.roiMargin = roiMargin  # margin added on every side, as a fraction of the bbox size
+        self.roiSize = roiSize  # longest side of the crop fed to MediaPipe
+        self.roiMinScore = roiMinScore  # handedness score below this falls back to full frame
+        self.roiHands = None  # separate graph so full-frame tracking state is not disturbed by crops
+        self.lastBbox = None
+        self.region = (0, 0, 0, 0)  # x, y, w, h of the image area the current results refer to
+        self.roiStats = {"roi": 0, "hits": 0, "reacquisitions": 0, "full": 0}
+
+        # Adaptive mode: run inference every N frames and extrapolate landmarks in between
+        self.adaptive = adaptive
+        self.maxSkip = maxSkip  # largest N
+        self.maxPredictionTime = maxPredictionTime  # seconds a prediction may extend past the last inference
+        self.fastSpeed = fastSpeed  # mean landmark speed (hand scales/s) at which every frame is inferred
+        self.cpuBudget = cpuBudget  # share of each frame interval inference may use on average
+        self.forceDetect = False  # set by the caller while a click or drag is in progress
+        self.skipInterval = 1
+        self.predicted = False
+        self.framesSinceInference = 0
+        self.lastInferenceTime = None
+        self.lastFrameTime = None
+        self.inferenceCost = 0.0  # EMA of seconds per inference
+        self.frameInterval = 1 / 30  # EMA of seconds between frames
+        self.handSpeed = 0.0
+        self.skipStats = {"inferred": 0, "predicted": 0, "forced": 0}
+
+        self.telemetry = None  # optional TelemetryModule.Telemetry for per-stage timings
+
+        # Mirror landmark x instead of the frame's pixels; for runs without a preview, where frames are not flipped
+        self.mirror = mirror
+        self.frameWidth = 0
+        self.frameHeight = 0
+        # Flat scratch buffers; RGB and resized crops are written into reshaped prefixes of them
+        self._rgbBuf = np.empty(0, dtype=np.uint8)
+        self._cropBuf = np.empty(0, dtype=np.uint8)
+
+        # MediaPipe graphs are built on the first findHands()/warmup(), so landmark replay through
+        # loadLandmarks() works without mediapipe installed
+        self.mpHands = None
+        self.mpDraw = None
+        self.hands = None
         self.tipIds = [4, 8, 12, 16, 20]  # [thumb, index, middle, ring, pinky]
+        self.results = None
 
-    def findHands(self, img, draw=True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
+        # Landmarks of every hand in pixels (x, y, z scaled like x), reused every frame
+        self.lmArray = np.zeros((self.maxHands, 21, 3), dtype=np.float32)
+        self.handCount = 0
+        self._lmFlat = self.lmArray.reshape(self.maxHands, 63)  # view for index lookups
+        self._scale = np.ones(3, dtype=np.float32)
+        self._offset = np.zeros(3, dtype=np.float32)
 
-        if self.results.multi_hand_landmarks:
+        # Flat indices into _lmFlat: thumb compares x against its IP joint, other fingers y against the PIP joint
+        tipAxis = [0, 1, 1, 1, 1]
+        self._tipFlat = np.array([tip * 3 + axis for tip, axis in zip(self.tipIds, tipAxis)])
+        self._baseFlat = np.array([(tip - (1 if axis == 0 else 2)) * 3 + axis
+                                   for tip, axis in zip(self.tipIds, tipAxis)])
+        self._tipXYFlat = np.array([[tip * 3, tip * 3 + 1] for tip in self.tipIds])
+
+        # Per-frame features, all preallocated
+        self._tipVals = np.zeros((self.maxHands, 5), dtype=np.float32)
+        self._baseVals = np.zeros((self.maxHands, 5), dtype=np.float32)
+        self.fingerMask = np.zeros((self.maxHands, 5), dtype=bool)
+        self._tipXY = np.zeros((self.maxHands, 5, 2), dtype=np.float32)
+        self._tipDiff = np.zeros((self.maxHands, 5, 5, 2), dtype=np.float32)
+        self.tipDist = np.zeros((self.maxHands, 5, 5), dtype=np.float32)
+        # Hand scale (wrist to middle finger MCP, pixels) and tip distances in units of it,
+        # so gesture thresholds hold at any capture resolution and distance from the camera
+        self._scaleDiff = np.zeros((self.maxHands, 2), dtype=np.float32)
+        self.handScale = np.ones(self.maxHands, dtype=np.float32)
+        self.tipRatio = np.zeros((self.maxHands, 5, 5), dtype=np.float32)
+
+        # Constant-velocity model state
+        self._prevLm = np.zeros_like(self.lmArray)
+        self._velocity = np.zeros_like(self.lmArray)
+        self._step = np.zeros_like(self.lmArray)
+        self._prevHandCount = 0
+
+        self.handViews = [LandmarkList(self.lmArray[hand]) for hand in range(self.maxHands)]
+        self._noHand = LandmarkList(self.lmArray[0])
+        self.lmList = self._noHand
+
+    def findHands(self, img, draw=True, now=None):
+        now = time.time() if now is None else now
+        if self.lastFrameTime is not None:
+            self.frameInterval = 0.9 * self.frameInterval + 0.1 * max(1e-3, now - self.lastFrameTime)
+        self.lastFrameTime = now
+
+        h, w = img.shape[:2]
+        if w != self.frameWidth or h != self.frameHeight:
+            # New capture resolution: the ROI and the motion model refer to the old frame size
+            self.frameWidth, self.frameHeight = w, h
+            self.lastBbox = None
+            self.lastInferenceTime = None
+
+        if self.adaptive and self.shouldPredict(now):
+            self.predictLandmarks(now)
+            self.updateBbox()
+            return img
+
+        start = time.perf_counter()
+        if not (self.roi and self.lastBbox is not None and self.findHandsRoi(img)):
+            self.createHands()
+            t0 = time.perf_counter()
+            imgRGB = self.toRGB(img)
+            t1 = time.perf_counter()
+            self.results = self.hands.process(imgRGB)
+            self.record("color", t1 - t0)
+            self.record("inference", time.perf_counter() - t1)
+            self.region = (0, 0, w, h)
+            self.roiStats["full"] += 1
+            self.handCount = 0
+            if self.results.multi_hand_landmarks:
+                self.extractLandmarks()
+        self.predicted = False
+        self.updateBbox()
+
+        if self.adaptive:
+            self.inferenceCost = 0.8 * self.inferenceCost + 0.2 * (time.perf_counter() - start)
+            self.updateMotion(now)
+
+        if draw and self.handCount:
+            # Landmarks are normalized to the processed region, so draw onto a view of that region
+            x, y, rw, rh = self.region
+            view = img[y:y + rh, x:x + rw]
             for handLms in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mpDraw.draw_landmarks(img, handLms, self.mpHands.HAND_CONNECTIONS,
-                                               self.mpDraw.DrawingSpec(color=(255, 0, 255), thickness=2,
-                                                                       circle_radius=2),
-                                               self.mpDraw.DrawingSpec(color=(57, 255, 20), thickness=2))
+                self.mpDraw.draw_landmarks(view, handLms, self.mpHands.HAND_CONNECTIONS,
+                                           self.mpDraw.DrawingSpec(color=(255, 0, 255), thickness=2,
+                                                                   circle_radius=2),
+                                           self.mpDraw.DrawingSpec(color=(57, 255, 20), thickness=2))
         return img
 
+    def warmup(self, width=640, height=480):
+        """Run both graphs once on a blank frame, so the first real frame does not pay for their initialization"""
+        blank = np.zeros((height, width, 3), dtype=np.uint8)
+        self.createHands()
+        self.hands.process(self.toRGB(blank))
+        if self.roi:
+            self.createRoiHands()
+            self.roiHands.process(self.toRGB(blank[:self.roiSize, :self.roiSize]))
+
+    def updateBbox(self):
+        if self.handCount:
+            landmarks = self.lmArray[0]
+            self.lastBbox = (int(landmarks[:, 0].min()), int(landmarks[:, 1].min()),
+                             int(landmarks[:, 0].max()), int(landmarks[:, 1].max()))
+        else:
+            self.lastBbox = None
+
+    def shouldPredict(self, now):
+        """True when this frame can be served from the motion model instead of MediaPipe"""
+        if not self.handCount or self.lastInferenceTime is None:
+            return False
+        if now - self.lastInferenceTime > self.maxPredictionTime:
+            return False
+        if self.framesSinceInference + 1 >= self.skipInterval:
+            return False
+        if self.forceDetect:
+            self.skipStats["forced"] += 1
+            return False
+        return True
+
+    def predictLandmarks(self, now):
+        """Extrapolate every hand from the last inference with its constant velocity"""
+        np.multiply(self._velocity, now - self.lastInferenceTime, out=self._step)
+        np.add(self._prevLm, self._step, out=self.lmArray)
+        self.updateFeatures()
+        self.framesSinceInference += 1
+        self.predicted = True
+        self.skipStats["predicted"] += 1
+
+    def updateMotion(self, now):
+        """Update the velocity estimate and choose how many frames to skip until the next inference"""
+        if self.handCount and self._prevHandCount == self.handCount and self.lastInferenceTime is not None:
+            dt = max(1e-3, now - self.lastInferenceTime)
+            np.subtract(self.lmArray, self._prevLm, out=self._velocity)
+            np.divide(self._velocity, dt, out=self._velocity)
+            speed = np.hypot(self._velocity[0, :, 0], self._velocity[0, :, 1]).mean()
+            self.handSpeed = float(speed / self.handScale[0])
+        else:
+            self._velocity.fill(0)
+            self.handSpeed = 0.0
+        np.copyto(self._prevLm, self.lmArray)
+        self._prevHandCount = self.handCount
+        self.lastInferenceTime = now
+        self.framesSinceInference = 0
+        self.skipStats["inferred"] += 1
+
+        # Still hand -> larger N; never less than the N that keeps inference within the CPU budget
+        speedN = 1 + int((self.maxSkip - 1) * max(0.0, 1 - self.handSpeed / self.fastSpeed))
+        budgetN = math.ceil(self.inferenceCost / (self.cpuBudget * self.frameInterval))
+        self.skipInterval = max(1, min(self.maxSkip, max(speedN, budgetN)))
+
+    def findHandsRoi(self, img):
+        """Detect on a crop around the last bbox; returns False when full-frame detection is needed"""
+        h, w = img.shape[:2]
+        x1, y1, x2, y2 = self.lastBbox
+        if self.mirror:
+            x1, x2 = w - x2, w - x1  # the bbox is in mirrored coordinates, the crop in image coordinates
+        mx = int((x2 - x1) * self.roiMargin) + 10
+        my = int((y2 - y1) * self.roiMargin) + 10
+        x1, y1 = max(0, x1 - mx), max(0, y1 - my)
+        x2, y2 = min(w, x2 + mx), min(h, y2 + my)
+        rw, rh = x2 - x1, y2 - y1
+        if rw < 32 or rh < 32 or rw * rh >= w * h * 0.8:
+            return False
+
+        self.createRoiHands()
+
+        t0 = time.perf_counter()
+        crop = img[y1:y2, x1:x2]
+        scale = self.roiSize / max(rw, rh)
+        if scale < 1:
+            cw, ch = max(1, int(rw * scale)), max(1, int(rh * scale))
+            self._cropBuf = self.scratch(self._cropBuf, ch * cw * 3)
+            resized = self._cropBuf[:ch * cw * 3].reshape(ch, cw, 3)
+            crop = cv2.resize(crop, (cw, ch), dst=resized, interpolation=cv2.INTER_AREA)
+        cropRGB = self.toRGB(crop)
+        t1 = time.perf_counter()
+        self.roiStats["roi"] += 1
+        results = self.roiHands.process(cropRGB)
+        self.record("color", t1 - t0)
+        self.record("inference", time.perf_counter() - t1)
+
+        if not results.multi_hand_landmarks:
+            self.roiStats["reacquisitions"] += 1
+            return False
+        if results.multi_handedness and results.multi_handedness[0].classification[0].score < self.roiMinScore:
+            self.roiStats["reacquisitions"] += 1
+            return False
+
+        self.results = results
+        self.region = (x1, y1, rw, rh)
+        self.extractLandmarks()
+
+        # A hand touching the crop border is probably leaving it, so re-detect on the full frame
+        landmarks = self.lmArray[0]
+        xs = landmarks[:, 0]
+        xMin, xMax = (w - xs.max(), w - xs.min()) if self.mirror else (xs.min(), xs.max())
+        edge = 2
+        if ((x1 > 0 and xMin <= x1 + edge) or (y1 > 0 and landmarks[:, 1].min() <= y1 + edge) or
+                (x2 < w and xMax >= x2 - edge) or (y2 < h and landmarks[:, 1].max() >= y2 - edge)):
+            self.roiStats["reacquisitions"] += 1
+            return False
+
+        self.roiStats["hits"] += 1
+        return True
+
+    def createHands(self):
+        """Import mediapipe and build the full-frame graph, once"""
+        if self.hands is None:
+            loadMediapipe()
+            self.mpHands = mp.solutions.hands
+            self.mpDraw = mp.solutions.drawing_utils
+            self.hands = self.mpHands.Hands(
+                static_image_mode=self.mode,
+                max_num_hands=self.maxHands,
+                min_detection_confidence=self.detection_confidence,
+                min_tracking_confidence=self.tracking_confidence
+            )
+
+    def createRoiHands(self):
+        self.createHands()
+        if self.roiHands is None:
+            self.roiHands = self.mpHands.Hands(
+                static_image_mode=self.mode,
+                max_num_hands=1,
+                min_detection_confidence=self.detection_confidence,
+                min_tracking_confidence=self.tracking_confidence
+            )
+
+    def roiHitRate(self):
+        """Fraction of ROI attempts that avoided a full-frame detection"""
+        if not self.roiStats["roi"]:
+            return 0.0
+        return self.roiStats["hits"] / self.roiStats["roi"]
+
+    @staticmethod
+    def scratch(buf, size):
+        """Grow a flat scratch buffer when needed; steady state reuses it"""
+        return buf if len(buf) >= size else np.empty(size, dtype=np.uint8)
+
+    def toRGB(self, img):
+        """BGR -> RGB into the reused buffer, returned read-only so MediaPipe takes it without copying"""
+        h, w = img.shape[:2]
+        self._rgbBuf = self.scratch(self._rgbBuf, h * w * 3)
+        imgRGB = self._rgbBuf[:h * w * 3].reshape(h, w, 3)
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=imgRGB)
+        imgRGB.flags.writeable = False
+        return imgRGB
+
+    def record(self, stage, seconds):
+        if self.telemetry is not None:
+            self.telemetry.record(stage, seconds)
+
+    def extractLandmarks(self):
+        """Copy normalized MediaPipe landmarks into lmArray as full-frame pixels and update the batched features"""
+        start = time.perf_counter()
+        x, y, rw, rh = self.region
+        hands = self.results.multi_hand_landmarks[:self.maxHands]
+        for hand, handLms in enumerate(hands):
+            out = self.lmArray[hand]
+            for id, lm in enumerate(handLms.landmark):
+                out[id] = (lm.x, lm.y, lm.z)
+        self.handCount = len(hands)
+
+        self._scale[0], self._scale[1], self._scale[2] = rw, rh, rw
+        self._offset[0], self._offset[1] = x, y
+        if self.mirror:
+            self._scale[0], self._offset[0] = -rw, self.frameWidth - x
+        np.multiply(self.lmArray, self._scale, out=self.lmArray)
+        np.add(self.lmArray, self._offset, out=self.lmArray)
+        self.updateFeatures()
+        self.record("landmarks", time.perf_counter() - start)
+
+    def loadLandmarks(self, landmarks):
+        """Use recorded pixel landmarks, (hands, 21, 3) or (21, 3), instead of running MediaPipe"""
+        landmarks = np.asarray(landmarks, dtype=np.float32)
+        if landmarks.ndim == 2:
+            landmarks = landmarks[None]
+        hands = 0
+        for hand in range(min(len(landmarks), self.maxHands)):
+            if np.isnan(landmarks[hand]).any():
+                break
+            np.copyto(self.lmArray[hand], landmarks[hand])
+            hands += 1
+        self.handCount = hands
+        self.predicted = False
+        if hands:
+            self.updateFeatures()
+        self.updateBbox()
+
+    def updateFeatures(self):
+        """Fingers-up mask and pairwise tip distance matrix for all hands in one batched pass"""
+        np.take(self._lmFlat, self._tipFlat, axis=1, out=self._tipVals)
+        np.take(self._lmFlat, self._baseFlat, axis=1, out=self._baseVals)
+        np.less(self._tipVals, self._baseVals, out=self.fingerMask)
+
+        np.take(self._lmFlat, self._tipXYFlat, axis=1, out=self._tipXY)
+        np.subtract(self._tipXY[:, :, None, :], self._tipXY[:, None, :, :], out=self._tipDiff)
+        np.hypot(self._tipDiff[..., 0], self._tipDiff[..., 1], out=self.tipDist)
+
+        np.subtract(self.lmArray[:, 0, :2], self.lmArray[:, 9, :2], out=self._scaleDiff)
+        np.hypot(self._scaleDiff[:, 0], self._scaleDiff[:, 1], out=self.handScale)
+        np.maximum(self.handScale, 1.0, out=self.handScale)
+        np.divide(self.tipDist, self.handScale[:, None, None], out=self.tipRatio)
+
     def findPosition(self, img, handNo=0, draw=True):
-        self.lmList = []
-        xList = []
-        yList = []
         bbox = []
+        if handNo < self.handCount:
+            self.lmList = self.handViews[handNo]
+            self.lmList.count = 21
+            landmarks = self.lmArray[handNo]
 
-        if self.results.multi_hand_landmarks:
-            myHand = self.results.multi_hand_landmarks[handNo]
-            for id, lm in enumerate(myHand.landmark):
-                h, w, c = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                self.lmList.append([id, cx, cy])
-                xList.append(cx)
-                yList.append(cy)
+            if draw:
+                for id in self.tipIds:
+                    cv2.circle(img, (int(landmarks[id, 0]), int(landmarks[id, 1])), 5, (255, 0, 0), cv2.FILLED)
 
-                if draw and id in self.tipIds:
-                    cv2.circle(img, (cx, cy), 5, (255, 0, 0), cv2.FILLED)
-
-            if xList and yList:
-                bbox = min(xList), min(yList), max(xList), max(yList)
-                if draw:
-                    cv2.rectangle(img, (bbox[0] - 20, bbox[1] - 20),
-                                  (bbox[2] + 20, bbox[3] + 20), (0, 255, 0), 2)
+            xs, ys = landmarks[:, 0], landmarks[:, 1]
+            bbox = int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())
+            if draw:
+                cv2.rectangle(img, (bbox[0] - 20, bbox[1] - 20),
+                              (bbox[2] + 20, bbox[3] + 20), (0, 255, 0), 2)
+        else:
+            self.lmList = self._noHand
 
         return self.lmList, bbox
 
-    def fingersUp(self):
-        fingers = []
-        if len(self.lmList) >= 21:
-            # Thumb
-            if self.lmList[self.tipIds[0]][1] < self.lmList[self.tipIds[0] - 1][1]:
-                fingers.append(1)
-            else:
-                fingers.append(0)
-
-            # Other fingers
-            for id in range(1, 5):
-                if self.lmList[self.tipIds[id]][2] < self.lmList[self.tipIds[id] - 2][2]:
-                    fingers.append(1)
-                else:
-                    fingers.append(0)
-        return fingers
+    def fingersUp(self, handNo=0):
+        if handNo >= self.handCount:
+            return []
+        return self.fingerMask[handNo].view(np.uint8).tolist()
+
+    def handInfo(self, handNo=0):
+        """(label, score) from MediaPipe's handedness classifier, e.g. ("Right", 0.97)"""
+        if handNo >= self.handCount or not self.results or not self.results.multi_handedness:
+            return None, 0.0
+        classification = self.results.multi_handedness[handNo].classification[0]
+        label = classification.label
+        if self.mirror:
+            # MediaPipe expects mirrored input, so on unflipped frames its labels are swapped
+            label = "Left" if label == "Right" else "Right"
+        return label, classification.score
+
+    def tipDistances(self, handNo=0):
+        """5x5 distances between [thumb, index, middle, ring, pinky] tips in hand scales (view, overwritten next frame)"""
+        return self.tipRatio[handNo]
 
     def findDistance(self, p1, p2, img=None, draw=True, r=15, t=3):
         x1, y1 = self.lmList[p1][1:]
@@ -0,0 +1,200 @@
+import cv2
+import numpy as np
+
+
+class SpriteCanvas():
+    """BGRA drawing surface for pre-rendering static HUD elements once"""
+
+    def __init__(self, x, y, w, h):
+        self.x, self.y = x, y  # position of the sprite in the frame
+        self.bgr = np.zeros((h, w, 3), dtype=np.uint8)
+        self.alpha = np.zeros((h, w), dtype=np.uint8)
+
+    def _local(self, pt):
+        return pt[0] - self.x, pt[1] - self.y
+
+    # Shapes are drawn without anti-aliasing so the alpha stays a few discrete levels
+    def rectangle(self, pt1, pt2, color, thickness=-1, opacity=1.0):
+        cv2.rectangle(self.bgr, self._local(pt1), self._local(pt2), color, thickness, cv2.LINE_8)
+        cv2.rectangle(self.alpha, self._local(pt1), self._local(pt2), int(opacity * 255), thickness, cv2.LINE_8)
+
+    def text(self, text, org, scale, color, thickness=1, font=cv2.FONT_HERSHEY_SIMPLEX):
+        # Rasterize to a mask and threshold it, since some OpenCV builds anti-alias text regardless
+        mask = np.zeros_like(self.alpha)
+        cv2.putText(mask, text, self._local(org), font, scale, 255, thickness, cv2.LINE_8)
+        opaque = mask >= 128
+        self.bgr[opaque] = color
+        self.alpha[opaque] = 255
+
+    def layer(self, width=None, height=None):
+        """Cached layer, clipped to a width x height frame so it still shows on smaller captures"""
+        w = self.alpha.shape[1] if width is None else max(0, min(self.alpha.shape[1], width - self.x))
+        h = self.alpha.shape[0] if height is None else max(0, min(self.alpha.shape[0], height - self.y))
+        return OverlayLayer(self.x, self.y, self.bgr[:h, :w], self.alpha[:h, :w])
+
+
+class OverlayLayer():
+    """Cached sprite blended into its bounding rect only, with precomputed alpha"""
+
+    def __init__(self, x, y, bgr, alpha):
+        self.x, self.y = x, y
+        self.h, self.w = alpha.shape
+        self.bgr = bgr.copy()
+        self.mask = np.repeat((alpha == 255)[..., None], 3, axis=2)  # opaque pixels
+
+        levels = np.unique(alpha)
+        translucent = levels[(levels > 0) & (levels < 255)]
+        if len(translucent) == 0:
+            # Fully opaque or fully transparent pixels: a masked copy is enough
+            self.mode = "copy"
+        elif len(translucent) == 1 and levels[0] > 0:
+            # One opacity over the whole rect plus opaque details: a single addWeighted on the rect
+            self.mode = "uniform"
+            self.opacity = float(translucent[0]) / 255
+        else:
+            self.mode = "blend"
+            a = alpha.astype(np.float32)[..., None] / 255
+            self.premultiplied = bgr.astype(np.float32) * a + 0.5  # +0.5 rounds on the final cast
+            self.inverseAlpha = np.repeat(1 - a, 3, axis=2)
+            self.buffer = np.empty((self.h, self.w, 3), dtype=np.float32)
+
+    def blend(self, img):
+        roi = img[self.y:self.y + self.h, self.x:self.x + self.w]
+        if roi.shape[:2] != (self.h, self.w):
+            return  # layer does not fit this frame (resolution changed without a rebuild)
+        if self.mode == "blend":
+            np.multiply(roi, self.inverseAlpha, out=self.buffer)
+            np.add(self.buffer, self.premultiplied, out=self.buffer)
+            np.copyto(roi, self.buffer, casting="unsafe")
+            return
+        if self.mode == "uniform":
+            cv2.addWeighted(roi, 1 - self.opacity, self.bgr, self.opacity, 0, dst=roi)
+        np.copyto(roi, self.bgr, where=self.mask)
+
+
+class Hud():
+    """HUD compositor: static layers are rendered once, only dynamic elements are drawn per frame"""
+
+    CONTROLS = [
+        ("Index Finger: Move Cursor", (0, 255, 255)),  # Yellow
+        ("Index + Middle VERY Close: Left Click", (0, 255, 0)),  # Green
+        ("Thumb + Middle Close: Right Click", (0, 100, 255)),  # Orange
+        ("Index + Middle + Ring: Double Click", (255, 0, 255)),  # Magenta
+        ("Index + Middle MEDIUM: Smart Scroll", (100, 255, 100)),  # Light Green
+        ("  - Deadzone (40-60%): No Movement", (0, 150, 150)),  # Dark Cyan
+        ("  - <40%: Scroll UP (faster near 0%)", (100, 255, 100)),
+        ("  - >60%: Scroll DOWN (faster near 100%)", (100, 255, 100)),
+        ("Index + Thumb: Drag & Drop", (255, 255, 0)),  # Cyan
+        ("Press 'q' to Quit", (255, 255, 255))  # White
+    ]
+
+    def __init__(self, wCam, hCam, frameR, frameR_top, deadzone_min, deadzone_max, enabled=True):
+        self.enabled = enabled
+        self.deadzone_min = deadzone_min
+        self.deadzone_max = deadzone_max
+        self.layers = []
+        self.resize(wCam, hCam, frameR, frameR_top)
+
+    def resize(self, wCam, hCam, frameR, frameR_top):
+        """(Re)build the cached layers for a capture size and active region"""
+        self.wCam, self.hCam = wCam, hCam
+        self.frameR, self.frameR_top = frameR, frameR_top
+
+        # Scroll bar geometry
+        self.bar_x = wCam - 35  # Moved further from edge for better visibility
+        self.bar_y_start = 100  # Moved down to avoid overlapping with controls
+        self.bar_height = min(300, hCam - 150)  # Increased height for better precision
+        self.bar_width = 20  # Increased width
+
+        if self.enabled:
+            self.layers = [self.build_controls_guide(), self.build_scroll_bar()]
+
+    def build_controls_guide(self):
+        canvas = SpriteCanvas(5, 5, 346, 216)
+
+        # Semi-transparent background rectangle for better text visibility
+        canvas.rectangle((5, 5), (350, 220), (0, 0, 0), -1, opacity=0.7)
+
+        # Title
+        canvas.text("ENHANCED HAND GESTURE CONTROLS", (10, 25), 0.5, (255, 255, 255))
+
+        y_offset = 45
+        for i, (text, color) in enumerate(self.CONTROLS):
+            canvas.text(text, (10, y_offset + i * 16), 0.35, color)
+        return canvas.layer(self.wCam, self.hCam)
+
+    def build_scroll_bar(self):
+        bar_x, bar_y_start = self.bar_x, self.bar_y_start
+        bar_height, bar_width = self.bar_height, self.bar_width
+        canvas = SpriteCanvas(bar_x - 45, bar_y_start - 1, bar_width + 47, bar_height + 3)
+
+        # Background bar
+        canvas.rectangle((bar_x, bar_y_start), (bar_x + bar_width, bar_y_start + bar_height), (60, 60, 60), -1)
+
+        # Deadzone area (40-60% range)
+        deadzone_start = int((self.deadzone_min / 100) * bar_height)
+        deadzone_end = int((self.deadzone_max / 100) * bar_height)
+        canvas.rectangle((bar_x, bar_y_start + deadzone_start), (bar_x + bar_width, bar_y_start + deadzone_end),
+                         (0, 100, 100), -1)  # Dark yellow for deadzone
+
+        # Border
+        canvas.rectangle((bar_x, bar_y_start), (bar_x + bar_width, bar_y_start + bar_height), (255, 255, 255), 2)
+
+        # Deadzone label
+        canvas.text("DEAD", (bar_x - 45, bar_y_start + deadzone_start + 10), 0.3, (0, 150, 150))
+        canvas.text("ZONE", (bar_x - 45, bar_y_start + deadzone_start + 22), 0.3, (0, 150, 150))
+        return canvas.layer(self.wCam, self.hCam)
+
+    def draw_static(self, img):
+        """Draw the active region outline and blend the cached layers over it"""
+        if not self.enabled:
+            return
+
+        # Outlines are cheaper to draw directly than to blend as a frame-sized sprite
+        cv2.rectangle(img, (self.frameR, self.frameR_top), (self.wCam - self.frameR, self.hCam - self.frameR),
+                      (255, 0, 255), 2)
+        cv2.putText(img, "DETECTION AREA (Moved Up)", (self.frameR + 5, self.frameR_top + 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
+
+        for layer in self.layers:
+            layer.blend(img)
+
+    def draw_scroll_indicator(self, img, scroll_pos):
+        if not self.enabled:
+            return
+        bar_x, bar_y_start = self.bar_x, self.bar_y_start
+        pos_height = int((scroll_pos / 100) * self.bar_height)
+        indicator_size = 15
+        cv2.rectangle(img, (bar_x - 2, bar_y_start + pos_height - indicator_size // 2),
+                      (bar_x + self.bar_width + 2, bar_y_start + pos_height + indicator_size // 2),
+                      (0, 255, 0), -1)
+
+        # Percentage text
+        cv2.putText(img, f"{int(scroll_pos)}%", (bar_x - 45, bar_y_start + pos_height + 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+    def draw_fingers(self, img, fingers):
+        if not self.enabled:
+            return
+        for i, finger_up in enumerate(fingers):
+            color = (0, 255, 0) if finger_up else (0, 0, 255)
+            cv2.putText(img, str(finger_up), (self.wCam - 150 + i * 25, self.hCam - 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+    def draw_telemetry(self, img, lines):
+        """Per-stage p50/p95/p99 (ms) in the bottom-left corner"""
+        if not self.enabled or not lines:
+            return
+        y = self.hCam - 12 - 14 * len(lines)
+        cv2.putText(img, f"{'stage':<10}{'p50':>6}{'p95':>6}{'p99':>6}", (10, y),
+                    cv2.FONT_HERSHEY_PLAIN, 0.9, (255, 255, 255), 1)
+        for i, line in enumerate(lines):
+            cv2.putText(img, line, (10, y + 14 * (i + 1)), cv2.FONT_HERSHEY_PLAIN, 0.9, (255, 255, 255), 1)
+
+    def draw_stats(self, img, fps, latency_ms, dropped):
+        if not self.enabled:
+            return
+        cv2.putText(img, f'FPS: {int(fps)}', (self.wCam - 120, 30),
+                    cv2.FONT_HERSHEY_PLAIN, 2, (255, 255, 255), 2)
+        cv2.putText(img, f'Lat: {int(latency_ms)}ms Drop: {dropped}', (self.wCam - 190, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
@@ -0,0 +1,212 @@
+import heapq
+import threading
+import time
+from collections import deque
+
+
+class AutopyBackend():
+    """Mouse output through autopy; scrolling goes through pyautogui since autopy has none"""
+    smooth_scroll = False  # whole wheel clicks only
+    virtual_desktop = False  # autopy.mouse.move rejects points outside the main screen
+
+    def __init__(self):
+        import autopy
+
+        self.mouse = autopy.mouse
+        self.buttons = {"left": autopy.mouse.Button.LEFT, "right": autopy.mouse.Button.RIGHT}
+        self.pyautogui = None
+
+    def move(self, x, y):
+        self.mouse.move(x, y)
+
+    def click(self, button):
+        self.mouse.click(self.buttons[button])
+
+    def press(self, button):
+        self.mouse.toggle(self.buttons[button], True)
+
+    def release(self, button):
+        self.mouse.toggle(self.buttons[button], False)
+
+    def scroll(self, amount):
+        if self.pyautogui is None:
+            self.pyautogui = PyAutoGUIBackend().pyautogui
+        self.pyautogui.scroll(int(amount))
+
+
+class PyAutoGUIBackend():
+    """Mouse output through pyautogui, with its per-call pause disabled"""
+    smooth_scroll = False  # pyautogui.scroll takes whole clicks
+    virtual_desktop = True  # moveTo passes coordinates to the OS, secondary and negative ones included
+
+    def __init__(self):
+        import pyautogui
+
+        pyautogui.PAUSE = 0  # the default 0.1s sleep after every call would throttle the input thread
+        self.pyautogui = pyautogui
+
+    def move(self, x, y):
+        self.pyautogui.moveTo(x, y)
+
+    def click(self, button):
+        self.pyautogui.click(button=button)
+
+    def press(self, button):
+        self.pyautogui.mouseDown(button=button)
+
+    def release(self, button):
+        self.pyautogui.mouseUp(button=button)
+
+    def scroll(self, amount):
+        self.pyautogui.scroll(int(amount))
+
+
+class RecordingBackend():
+    """Fake backend for tests and benchmarks: records (time, kind, args) instead of moving the mouse"""
+    smooth_scroll = True  # keeps fractional scroll amounts as submitted
+    virtual_desktop = True
+
+    def __init__(self, keep=True):
+        self.keep = keep
+        self.events = []
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind, *args):
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            if self.keep:
+                self.events.append((time.time(), kind, args))
+
+    def move(self, x, y):
+        self.record("move", x, y)
+
+    def click(self, button):
+        self.record("click", button)
+
+    def press(self, button):
+        self.record("press", button)
+
+    def release(self, button):
+        self.record("release", button)
+
+    def scroll(self, amount):
+        self.record("scroll", amount)
+
+
+BACKENDS = {
+    "autopy": AutopyBackend,
+    "pyautogui": PyAutoGUIBackend,
+    "record": RecordingBackend,
+}
+
+
+def make_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown input backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+class InputService(threading.Thread):
+    """Input actuation thread: submit() never blocks, consecutive moves and scrolls are merged"""
+
+    def __init__(self, backend, double_click_interval=0.1, log=None, telemetry=None):
+        super().__init__(name="input", daemon=True)
+        self.backend = backend
+        self.double_click_interval = double_click_interval
+        self.log = log or (lambda action, details="": None)
+        self.telemetry = telemetry
+
+        self.events = deque()  # [kind, args] in submission order
+        self.timers = []  # heap of (due, seq, kind, args) for delayed events
+        self.timerSeq = 0
+        self.held = set()  # buttons currently pressed
+        self.cond = threading.Condition()
+        self.running = True
+        self.stats = {"submitted": 0, "coalesced": 0, "executed": 0, "errors": 0}
+        self.firstExecuted = {}  # kind -> time.perf_counter() of its first execution, for startup timing
+
+    def submit(self, kind, *args):
+        """Queue an action: move(x, y), click(button), double_click(), press(button), release(button), scroll(amount)"""
+        with self.cond:
+            self.stats["submitted"] += 1
+            last = self.events[-1] if self.events else None
+            if last is not None and last[0] == kind == "move":
+                last[1] = args  # only the newest cursor target matters
+                self.stats["coalesced"] += 1
+            elif last is not None and last[0] == kind == "scroll":
+                last[1] = (last[1][0] + args[0],)
+                self.stats["coalesced"] += 1
+            else:
+                self.events.append([kind, args])
+            self.cond.notify()
+
+    def schedule(self, delay, kind, *args):
+        with self.cond:
+            self.timerSeq += 1
+            heapq.heappush(self.timers, (time.monotonic() + delay, self.timerSeq, kind, args))
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.events and not self.due():
+                    timeout = self.timers[0][0] - time.monotonic() if self.timers else None
+                    self.cond.wait(timeout)
+                if not self.running:
+                    break
+                if self.events:
+                    kind, args = self.events.popleft()
+                else:
+                    kind, args = heapq.heappop(self.timers)[2:]
+            self.execute(kind, args)
+
+        # Never leave a button held down when the app exits
+        for button in list(self.held):
+            self.execute("release", (button,))
+
+    def due(self):
+        return bool(self.timers) and self.timers[0][0] <= time.monotonic()
+
+    def execute(self, kind, args):
+        start = time.perf_counter()
+        try:
+            if kind == "move":
+                self.backend.move(*args)
+            elif kind == "click":
+                self.backend.click(*args)
+            elif kind == "double_click":
+                # Second press is scheduled, not slept for
+                self.backend.click("left")
+                self.schedule(self.double_click_interval, "click", "left")
+            elif kind == "press":
+                self.backend.press(*args)
+                self.held.add(args[0])
+            elif kind == "release":
+                self.backend.release(*args)
+                self.held.discard(args[0])
+            elif kind == "scroll":
+                self.backend.scroll(*args)
+            self.stats["executed"] += 1
+            if kind not in self.firstExecuted:
+                self.firstExecuted[kind] = time.perf_counter()
+        except Exception as e:
+            self.stats["errors"] += 1
+            self.log("INPUT ERROR", f"{kind}: {e}")
+        if self.telemetry is not None:
+            self.telemetry.record("actuation", time.perf_counter() - start)
+
+    def pending(self):
+        with self.cond:
+            return len(self.events) + len(self.timers)
+
+    def stop(self, timeout=1.0):
+        """Flush queued events, release held buttons and stop the thread"""
+        deadline = time.monotonic() + timeout
+        while self.is_alive() and self.pending() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.is_alive():
+            self.join(timeout)
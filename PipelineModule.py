@@ -0,0 +1,306 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+import GovernorModule as gvm
+import HandTrackingModule as htm
+
+
+class DropOldestQueue():
+    """Bounded queue that discards the oldest item instead of blocking the producer"""
+
+    def __init__(self, maxsize=1, name="queue", on_drop=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.on_drop = on_drop  # called with each discarded item, e.g. to recycle its frame buffer
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                old = self.items.popleft()
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(old)
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None on timeout / when the queue is closed and empty"""
+        with self.cond:
+            if timeout is None:
+                while not self.items and not self.closed:
+                    self.cond.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while not self.items and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def depth(self):
+        with self.cond:
+            return len(self.items)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {"depth": len(self.items), "maxsize": self.maxsize, "dropped": self.dropped}
+
+
+class FramePool():
+    """Recycled arrays (frame buffers, landmark snapshots): grows to the number in flight, then allocates nothing"""
+
+    def __init__(self):
+        self.free = []
+        self.allocated = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        with self.lock:
+            while self.free:
+                buf = self.free.pop()
+                if buf.shape == shape and buf.dtype == dtype:
+                    return buf
+                self.allocated -= 1  # resolution changed, let the old buffer go
+            self.allocated += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buf):
+        if buf is not None:
+            with self.lock:
+                self.free.append(buf)
+
+    def release_packet(self, packet):
+        self.release(packet.img)
+        packet.img = None
+
+
+class FramePacket():
+    """Everything one stage hands to the next for a single captured frame"""
+    __slots__ = ("index", "timestamp", "img", "lmList", "bbox", "fingers", "landmarks", "tipDist", "hand")
+
+    def __init__(self, index, timestamp, img):
+        self.index = index
+        self.timestamp = timestamp  # capture time, used for end-to-end latency
+        self.img = img
+        self.lmList = []
+        self.bbox = []
+        self.fingers = []
+        self.landmarks = None  # (21, 3) pixel landmarks, owned by the inference worker's buffer pool
+        self.tipDist = None  # 5x5 tip distances in hand scales, same ownership
+        self.hand = None  # (label, score) of MediaPipe's handedness classification
+
+
+class StageThread(threading.Thread):
+    """Daemon thread that runs step() until stopped"""
+
+    def __init__(self, name):
+        super().__init__(name=name, daemon=True)
+        self.stopEvent = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stopEvent.is_set():
+                if not self.step():
+                    break
+        except Exception as e:  # surface the failure to the main thread instead of dying silently
+            self.error = e
+        finally:
+            self.finish()
+
+    def step(self):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def stop(self):
+        self.stopEvent.set()
+
+
+class CaptureThread(StageThread):
+    """Reads frames from the camera and keeps only the newest ones in a bounded ring"""
+
+    def __init__(self, cap, out_queue, pool, flip=True, telemetry=None):
+        super().__init__("capture")
+        self.cap = cap
+        self.out_queue = out_queue
+        self.pool = pool
+        self.flip = flip
+        self.telemetry = telemetry
+        self.frameIndex = 0
+        self.raw = None  # camera buffer that frames are mirrored out of
+        self.shape = None
+        self.pendingTier = None
+        self.minInterval = 0.0  # frames closer together than this are read (draining the driver) but not forwarded
+        self.lastForward = 0.0
+        self.skipped = 0
+
+    def configure(self, tier):
+        """Switch to a GovernorModule.Tier; applied by this thread between two reads"""
+        self.pendingTier = tier
+
+    def step(self):
+        import cv2
+
+        tier, self.pendingTier = self.pendingTier, None
+        if tier is not None:
+            gvm.configure_camera(self.cap, tier)
+            self.minInterval = 0.9 / tier.fps if tier.fps else 0.0
+
+        start = time.perf_counter()
+        if self.flip:
+            success, self.raw = self.cap.read(self.raw)
+            img = self.raw
+        else:
+            # No mirroring: the camera writes straight into a pooled buffer
+            buf = self.pool.acquire(self.shape) if self.shape is not None else None
+            success, img = self.cap.read(buf)
+            if not success:
+                self.pool.release(buf)
+            elif img is not buf:
+                # First frame or new resolution: the camera's own array joins the pool in place of buf
+                self.pool.allocated += buf is None
+        if self.telemetry is not None:
+            self.telemetry.record("capture", time.perf_counter() - start)
+        if not success:
+            print("Failed to grab frame")
+            return False
+        timestamp = time.time()
+        self.shape = img.shape
+        if timestamp - self.lastForward < self.minInterval:
+            # Above the tier's frame rate: keep reading so the newest frame is fresh, skip inference
+            if not self.flip:
+                self.pool.release(img)
+            self.skipped += 1
+            return True
+        self.lastForward = timestamp
+
+        # Flip image horizontally for mirror effect, into a recycled buffer
+        if self.flip:
+            img = cv2.flip(self.raw, 1, dst=self.pool.acquire(self.shape))
+        self.out_queue.put(FramePacket(self.frameIndex, timestamp, img))
+        self.frameIndex += 1
+        return True
+
+    def finish(self):
+        self.out_queue.close()
+
+
+class InferenceWorker(StageThread):
+    """Runs hand detection and landmark extraction on the newest captured frame"""
+
+    def __init__(self, detector, in_queue, out_queue, draw=True):
+        super().__init__("inference")
+        self.detector = detector
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.draw = draw
+
+        # The detector reuses its arrays every frame, so each packet gets its own snapshot. Snapshots
+        # come back when the consumer releases the packet or a queue drops it, so one the consumer
+        # still holds is never overwritten; the pools stop growing at the number of packets in flight.
+        self.lmPool = FramePool()
+        self.distPool = FramePool()
+
+    def step(self):
+        packet = self.in_queue.get(timeout=0.1)
+        if packet is None:
+            return not self.in_queue.closed
+
+        packet.img = self.detector.findHands(packet.img, draw=self.draw, now=packet.timestamp)
+        lmList, packet.bbox = self.detector.findPosition(packet.img, draw=self.draw)
+        packet.fingers = self.detector.fingersUp()
+        packet.hand = self.detector.handInfo()
+
+        packet.landmarks = self.lmPool.acquire((21, 3), np.float32)
+        packet.tipDist = self.distPool.acquire((5, 5), np.float32)
+        np.copyto(packet.landmarks, self.detector.lmArray[0])
+        np.copyto(packet.tipDist, self.detector.tipRatio[0])
+        packet.lmList = htm.LandmarkList(packet.landmarks, len(lmList))
+        self.out_queue.put(packet)
+        return True
+
+    def finish(self):
+        self.out_queue.close()
+
+
+class Pipeline():
+    """Capture -> inference -> (main thread gestures/HUD) -> actuation
+
+    The actuator is an InputModule.InputService (or anything with start/submit/stop).
+    """
+
+    def __init__(self, cap, detector, actuator, flip=True, draw=True, capture_depth=1, result_depth=1,
+                 telemetry=None):
+        # Frame buffers go back to the pool when a queue drops a packet or the consumer calls release()
+        self.pool = FramePool()
+        self.frames = DropOldestQueue(capture_depth, "capture", on_drop=self.pool.release_packet)
+        self.results = DropOldestQueue(result_depth, "inference", on_drop=self.release)
+
+        self.capture = CaptureThread(cap, self.frames, self.pool, flip=flip, telemetry=telemetry)
+        self.inference = InferenceWorker(detector, self.frames, self.results, draw=draw)
+        self.actuator = actuator
+        self.stages = [self.capture, self.inference]
+
+    def start(self):
+        self.actuator.start()
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def next_result(self, timeout=1.0):
+        return self.results.get(timeout=timeout)
+
+    def configure_capture(self, tier):
+        """Apply a GovernorModule.Tier (resolution, FPS, one-frame driver buffer) from the capture thread"""
+        self.capture.configure(tier)
+
+    def release(self, packet):
+        """Return a consumed packet's frame buffer and landmark snapshots for reuse"""
+        self.pool.release_packet(packet)
+        self.inference.lmPool.release(packet.landmarks)
+        self.inference.distPool.release(packet.tipDist)
+        packet.landmarks = packet.tipDist = None
+
+    def submit(self, kind, *args):
+        self.actuator.submit(kind, *args)
+
+    def alive(self):
+        """False once a stage failed, or stopped and its last results were consumed"""
+        if self.errors():
+            return False
+        return all(stage.is_alive() for stage in self.stages) or self.results.depth() > 0
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for queue in (self.frames, self.results):
+            queue.close()
+        for stage in self.stages:
+            stage.join(timeout=1.0)
+        self.actuator.stop()
+
+    def errors(self):
+        return [(stage.name, stage.error) for stage in self.stages if stage.error is not None]
+
+    def stats(self):
+        stats = {queue.name: queue.stats() for queue in (self.frames, self.results)}
+        stats["frame_pool"] = {"allocated": self.pool.allocated, "free": len(self.pool.free)}
+        stats["capture_skipped"] = self.capture.skipped
+        return stats
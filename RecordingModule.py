@@ -0,0 +1,432 @@
+"""Binary session log: one fixed-size record per frame, replayable through the gesture logic without a camera.
+
+    python "Virtual Mouse.py" --record session.vmrec
+    python RecordingModule.py session.vmrec --scroll-threshold 0.8 --click-cooldown 0.25
+    python RecordingModule.py session.vmrec --show 1200 1260
+
+The file is a JSON header followed by packed records, so readers memory-map it and replay runs at
+numpy speed. A session cut short by a crash stays readable up to its last complete record.
+"""
+import argparse
+import json
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+import FilterModule as flm
+import GestureModule as gm
+import ScreenModule as scm
+import ScrollModule as scrm
+
+MAGIC = b"VMREC001"
+HEADER_ALIGN = 512
+
+# Codes stored in the records; index 0 of GESTURES means no gesture (or no hand)
+GESTURES = ["none", "move", "left_click", "right_click", "double_click", "scroll", "drag"]
+ACTIONS = ["move", "click", "double_click", "press", "release", "scroll"]
+BUTTONS = ["left", "right"]
+HANDEDNESS = ["", "Left", "Right"]  # MediaPipe handedness labels, "" when unknown
+VERSION = 2  # 2 added the per-hand handedness label and score
+MAX_EVENTS = 6  # input events stored per frame; event_count keeps the real number
+
+EVENT_DTYPE = np.dtype([("kind", np.uint8), ("a", np.float32), ("b", np.float32)])
+TIP_IDS = [4, 8, 12, 16, 20]
+
+
+def record_dtype(max_hands=1, version=VERSION):
+    fields = [
+        ("time", np.float64),
+        ("hands", np.uint8),
+        ("fingers", np.uint8, (max_hands,)),  # fingersUp packed as in GestureEngine.pack
+        ("gesture", np.uint8),
+        ("event_count", np.uint8),
+        ("landmarks", np.float32, (max_hands, 21, 3)),  # pixels, as in handDetector.lmArray
+        ("events", EVENT_DTYPE, (MAX_EVENTS,)),
+    ]
+    if version >= 2:
+        fields += [
+            ("handedness", np.uint8, (max_hands,)),  # index into HANDEDNESS
+            ("score", np.float32, (max_hands,)),  # handedness classifier confidence
+        ]
+    return np.dtype(fields)
+
+
+def encode_event(kind, args):
+    """(kind, args) as submitted to InputService -> (code, a, b)"""
+    if kind == "move":
+        return ACTIONS.index(kind), args[0], args[1]
+    if kind in ("click", "press", "release"):
+        return ACTIONS.index(kind), BUTTONS.index(args[0]), 0.0
+    if kind == "scroll":
+        return ACTIONS.index(kind), args[0], 0.0
+    return ACTIONS.index(kind), 0.0, 0.0
+
+
+def decode_event(event):
+    kind = ACTIONS[event["kind"]]
+    if kind == "move":
+        return kind, (float(event["a"]), float(event["b"]))
+    if kind in ("click", "press", "release"):
+        return kind, (BUTTONS[int(event["a"])],)
+    if kind == "scroll":
+        amount = float(event["a"])
+        return kind, (int(amount) if amount.is_integer() else amount,)
+    return kind, ()
+
+
+class SessionRecorder():
+    """Appends one record per frame; wrap the gesture state machine's submit to capture its input events"""
+
+    def __init__(self, path, width, height, max_hands=1, meta=None):
+        self.path = path
+        self.dtype = record_dtype(max_hands)
+        self.max_hands = max_hands
+        self.header = {"version": VERSION, "width": width, "height": height, "max_hands": max_hands,
+                       "created": time.time(), "gestures": GESTURES, "actions": ACTIONS, "meta": meta or {}}
+
+        header = json.dumps(self.header).encode()
+        size = -(-(len(MAGIC) + 4 + len(header)) // HEADER_ALIGN) * HEADER_ALIGN
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + struct.pack("<I", size) + header)
+        self.file.write(b"\0" * (size - len(MAGIC) - 4 - len(header)))
+
+        self.record_buf = np.zeros(1, dtype=self.dtype)  # reused for every frame
+        self.rec = self.record_buf[0]
+        self.bytes = self.record_buf.view(np.uint8)
+        self.pending = 0
+        self.count = 0
+        self.lock = threading.Lock()  # events also arrive from the scroll engine's timer thread
+
+    def wrap_submit(self, submit):
+        """submit(kind, *args) that also stores the event in the current frame's record"""
+        def recording_submit(kind, *args):
+            self.add_event(kind, args)
+            submit(kind, *args)
+        return recording_submit
+
+    def add_event(self, kind, args):
+        with self.lock:
+            if self.pending < MAX_EVENTS:
+                self.rec["events"][self.pending] = encode_event(kind, args)
+            self.pending += 1
+
+    def record(self, timestamp, landmarks, hands, fingers, gesture, handedness=None):
+        """Write one frame: landmarks (hands, 21, 3) or (21, 3), fingersUp lists, gesture name or None
+
+        handedness is (label, score) from handDetector.handInfo(), or a list of them per hand.
+        """
+        with self.lock:
+            rec = self.rec
+            rec["time"] = timestamp
+            rec["hands"] = hands
+            rec["gesture"] = GESTURES.index(gesture or "none")
+            rec["event_count"] = min(self.pending, 255)
+            if hands:
+                rec["landmarks"][:hands] = np.reshape(landmarks, (-1, 21, 3))[:hands]
+            rec["landmarks"][hands:] = np.nan
+            if fingers and not isinstance(fingers[0], (list, tuple)):
+                fingers = [fingers]
+            for hand in range(self.max_hands):
+                rec["fingers"][hand] = gm.GestureEngine.pack(fingers[hand]) if hand < hands and fingers else 0
+            if handedness and not isinstance(handedness[0], (list, tuple)):
+                handedness = [handedness]
+            for hand in range(self.max_hands):
+                label, score = handedness[hand] if handedness and hand < hands else (None, 0.0)
+                rec["handedness"][hand] = HANDEDNESS.index(label or "")
+                rec["score"][hand] = score
+            rec["events"][min(self.pending, MAX_EVENTS):] = 0
+
+            self.file.write(self.bytes)
+            self.pending = 0
+            self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+class SessionLog():
+    """Memory-mapped read access to a recorded session"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"'{path}' is not a session recording")
+            size = struct.unpack("<I", f.read(4))[0]
+            self.header = json.loads(f.read(size - len(MAGIC) - 4).rstrip(b"\0"))
+            f.seek(0, 2)
+            file_size = f.tell()
+
+        self.version = self.header.get("version", 1)
+        self.dtype = record_dtype(self.header["max_hands"], self.version)
+        count = (file_size - size) // self.dtype.itemsize  # ignores a partial last record
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+        self.width = self.header["width"]
+        self.height = self.header["height"]
+        self.meta = self.header.get("meta", {})
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self):
+        return self.records["time"]
+
+    def duration(self):
+        return float(self.times[-1] - self.times[0]) if len(self) > 1 else 0.0
+
+    def gesture(self, i):
+        return GESTURES[self.records["gesture"][i]]
+
+    def events(self, i):
+        count = min(int(self.records["event_count"][i]), MAX_EVENTS)
+        return [decode_event(event) for event in self.records["events"][i][:count]]
+
+    def find_gestures(self, name):
+        """Frame indices where the recorded gesture starts"""
+        codes = self.records["gesture"] == GESTURES.index(name)
+        return np.flatnonzero(codes & ~np.concatenate(([False], codes[:-1])))
+
+
+# fingersUp bitmask -> list, for every possible mask
+FINGER_LISTS = [[bits >> f & 1 for f in range(5)] for bits in range(32)]
+
+
+def make_replay_gestures(log, submit, **overrides):
+    """GestureStateMachine configured like the recorded session, with keyword overrides for tuning"""
+    meta = dict(log.meta)
+    meta.update(overrides)
+    cursor_filter = None
+    if meta.get("cursor_filter"):
+        cursor_filter = flm.PointFilter(meta["cursor_filter"], **meta.get("cursor_filter_params", {}))
+    return gm.GestureStateMachine(submit, log.width, log.height,
+                                  meta.get("frameR", 80), meta.get("frameR_top", 30),
+                                  meta.get("wScr", 1920), meta.get("hScr", 1080),
+                                  cursor_filter=cursor_filter,
+                                  click_cooldown=meta.get("click_cooldown", 0.3),
+                                  scroll_threshold=meta.get("scroll_threshold", 0.75),
+                                  deadzone_min=meta.get("deadzone_min", 40),
+                                  deadzone_max=meta.get("deadzone_max", 60),
+                                  monitors=[scm.Monitor(**m) for m in meta.get("monitors", [])] or None,
+                                  screen_target=meta.get("screen_target"),
+                                  acceleration=meta.get("acceleration"),
+                                  scroll_engine=scrm.ScrollEngine(submit, rate=meta.get("scroll_rate", 30.0),
+                                                                  smooth=meta.get("scroll_smooth", False)),
+                                  scroll_gain=meta.get("scroll_gain", 150.0),
+                                  scroll_min_speed=meta.get("scroll_min_speed", 60.0),
+                                  voter=gm.GestureVoter(**meta["voting"]) if meta.get("voting") else None)
+
+
+# One-shot input events -> the gesture code that fires them
+TRIGGERS = {("click", "left"): GESTURES.index("left_click"), ("click", "right"): GESTURES.index("right_click"),
+            ("double_click",): GESTURES.index("double_click")}
+
+
+def replay(log, submit=None, start=0, stop=None, chunk=4096, **overrides):
+    """Run recorded frames through the gesture logic as fast as possible
+
+    Returns (replayed gesture codes, per-frame event counts, per-frame classifications before voting,
+    fired clicks as (frame offset, gesture code)); submit receives every emitted input event.
+    """
+    stop = len(log) if stop is None else min(stop, len(log))
+    counter = [0]
+    fired = []
+    frame = [0]
+
+    def counting_submit(kind, *args):
+        counter[0] += 1
+        trigger = TRIGGERS.get((kind,) + args)
+        if trigger is not None:
+            fired.append((frame[0], trigger))
+        if submit is not None:
+            submit(kind, *args)
+
+    gestures = make_replay_gestures(log, counting_submit, **overrides)
+    ids = np.arange(21)
+    replayed = np.zeros(stop - start, dtype=np.uint8)
+    raw = np.zeros(stop - start, dtype=np.uint8)
+    event_counts = np.zeros(stop - start, dtype=np.int32)
+    codes = {g: GESTURES.index(g.name) for g in gestures.engine.gestures}
+    codes[None] = 0
+
+    for begin in range(start, stop, chunk):
+        block = log.records[begin:min(begin + chunk, stop)]
+        landmarks = np.nan_to_num(block["landmarks"][:, 0])
+        # Legacy [id, x, y] rows and tip distances in hand scales, for the whole block at once
+        # (same float32 operations as handDetector.updateFeatures, so replay decisions match exactly)
+        rows = np.empty((len(block), 21, 3), dtype=np.int64)
+        rows[:, :, 0] = ids
+        rows[:, :, 1:] = landmarks[:, :, :2].astype(np.int64)
+        tips = landmarks[:, TIP_IDS, :2]
+        diff = tips[:, :, None, :] - tips[:, None, :, :]
+        tip_dist = np.hypot(diff[..., 0], diff[..., 1])
+        wrist_mcp = landmarks[:, 0, :2] - landmarks[:, 9, :2]
+        scale = np.maximum(np.hypot(wrist_mcp[:, 0], wrist_mcp[:, 1]), np.float32(1.0))
+        tip_dist /= scale[:, None, None]
+
+        # Handedness only exists from format version 2 on; older logs replay with every frame confident
+        hands = None
+        if log.version >= 2:
+            hands = [(HANDEDNESS[label] or None, float(score))
+                     for label, score in zip(block["handedness"][:, 0], block["score"][:, 0])]
+
+        for j in range(len(block)):
+            i = frame[0] = begin + j - start
+            counter[0] = 0
+            if block["hands"][j]:
+                gesture = gestures.update(rows[j].tolist(), FINGER_LISTS[block["fingers"][j, 0]],
+                                          tip_dist[j], float(block["time"][j]), hands and hands[j])
+            else:
+                gesture = gestures.update([], [], None, float(block["time"][j]))
+            replayed[i] = GESTURES.index(gesture or "none")
+            raw[i] = codes[gestures.frame_gesture]
+            event_counts[i] = counter[0]
+    return replayed, event_counts, raw, fired
+
+
+def majority_filter(codes, width=9):
+    """Centered sliding-window majority of gesture codes; ties keep the frame's own code"""
+    n = len(codes)
+    onehot = np.zeros((n + 1, len(GESTURES)), dtype=np.int32)
+    onehot[np.arange(1, n + 1), codes] = 1
+    cumulative = np.cumsum(onehot, axis=0)
+    index = np.arange(n)
+    half = width // 2
+    counts = cumulative[np.minimum(index + half + 1, n)] - cumulative[np.maximum(index - half, 0)]
+    best = counts.argmax(axis=1)
+    return np.where(counts[index, codes] == counts[index, best], codes, best).astype(np.uint8)
+
+
+def trigger_metrics(raw, fired, times, width=9, tolerance=0.3):
+    """False-trigger figures for the clicks of a replay
+
+    The reference is the per-frame classification smoothed by a centered majority over width frames,
+    which sees the future and so drops the single noisy frames a live decision cannot. A click is
+    false when no reference segment of its gesture spans it (starting up to width // 2 frames later or
+    ending up to tolerance seconds earlier), a repeat when its segment already fired, and a segment
+    without any click is missed. The commit delay is the time from segment start to its first click.
+    """
+    reference = majority_filter(raw, width)
+    segments = {}  # gesture code -> (starts, ends), frame indices with ends inclusive
+    for code in set(TRIGGERS.values()):
+        edges = np.diff(np.concatenate(([0], (reference == code).astype(np.int8), [0])))
+        segments[code] = (np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1)
+
+    false = repeats = 0
+    matched = set()
+    delays = []
+    for frame, code in fired:
+        starts, ends = segments[code]
+        # Last segment starting at most half a window after the click
+        k = np.searchsorted(starts, frame + width // 2, side="right") - 1
+        if k < 0 or times[frame] > times[ends[k]] + tolerance:
+            false += 1
+        elif (code, k) in matched:
+            repeats += 1
+        else:
+            matched.add((code, k))
+            delays.append(times[frame] - times[starts[k]])
+
+    total_segments = sum(len(starts) for starts, _ in segments.values())
+    minutes = float(times[-1] - times[0]) / 60 if len(times) > 1 else 0.0
+    return {
+        "clicks": len(fired),
+        "false": false,
+        "repeats": repeats,
+        "segments": total_segments,
+        "missed": total_segments - len(matched),
+        "false_trigger_rate": round(false / len(fired), 4) if fired else 0.0,
+        "false_per_min": round(false / minutes, 2) if minutes > 0 else 0.0,
+        "commit_delay_ms": {"mean": round(float(np.mean(delays)) * 1000, 1) if delays else 0.0,
+                            "p90": round(float(np.percentile(delays, 90)) * 1000, 1) if delays else 0.0},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded virtual mouse session")
+    parser.add_argument("path")
+    parser.add_argument("--start", type=int, default=0)
+    parser.add_argument("--stop", type=int, default=None)
+    parser.add_argument("--show", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="print the recorded frames in this range instead of replaying")
+    parser.add_argument("--scroll-threshold", type=float, help="index-middle scroll distance, in hand scales")
+    parser.add_argument("--click-cooldown", type=float)
+    parser.add_argument("--filter", help="cursor filter for the replay: one_euro, kalman or ema")
+    parser.add_argument("--vote", type=int, nargs=2, metavar=("K", "N"),
+                        help="commit gestures by temporal voting: K of the last N frames")
+    parser.add_argument("--release", type=int, help="with voting, votes a committed gesture needs to stay")
+    parser.add_argument("--min-confidence", type=float, help="with voting, handedness score for a frame to vote")
+    parser.add_argument("--latency-budget", type=float, help="with voting, seconds a gesture may be delayed")
+    parser.add_argument("--no-vote", action="store_true", help="replay without the recorded session's voting")
+    parser.add_argument("--reference-window", type=int, default=9,
+                        help="frames of the majority filter that false triggers are measured against")
+    parser.add_argument("--diff", type=int, default=10, help="print the first N frames whose gesture changed")
+    args = parser.parse_args(argv)
+
+    log = SessionLog(args.path)
+    if args.show:
+        for i in range(args.show[0], min(args.show[1] + 1, len(log))):
+            rec = log.records[i]
+            events = ", ".join(f"{kind}{event_args}" for kind, event_args in log.events(i))
+            print(f"{i:7d} t={rec['time']:.3f} hands={rec['hands']} fingers={FINGER_LISTS[rec['fingers'][0]]} "
+                  f"{log.gesture(i):<12} {events}")
+        return
+
+    overrides = {}
+    if args.scroll_threshold is not None:
+        overrides["scroll_threshold"] = args.scroll_threshold
+    if args.click_cooldown is not None:
+        overrides["click_cooldown"] = args.click_cooldown
+    if args.filter:
+        overrides["cursor_filter"] = args.filter
+        overrides["cursor_filter_params"] = {}
+    # Voting parameters: the recorded session's, changed by any of the options above
+    voting_options = {key: getattr(args, key) for key in ("release", "min_confidence", "latency_budget")
+                      if getattr(args, key) is not None}
+    if args.vote:
+        voting_options["votes"], voting_options["window"] = args.vote
+        voting_options.setdefault("release", max(1, args.vote[0] - 1))
+    if args.no_vote:
+        overrides["voting"] = None
+    elif voting_options:
+        overrides["voting"] = dict(log.meta.get("voting") or {}, **voting_options)
+
+    actions = Counter()
+    start = time.perf_counter()
+    replayed, event_counts, raw, fired = replay(log, lambda kind, *a: actions.update((kind,)), args.start,
+                                                args.stop, **overrides)
+    wall = time.perf_counter() - start
+
+    stop = args.start + len(replayed)
+    recorded = log.records["gesture"][args.start:stop]
+    changed = np.flatnonzero(recorded != replayed)
+    span = float(log.times[stop - 1] - log.times[args.start]) if len(replayed) > 1 else 0.0
+    report = {
+        "frames": len(replayed),
+        "session_s": round(span, 2),
+        "replay_s": round(wall, 3),
+        "speedup": round(span / wall, 1) if wall > 0 else 0.0,
+        "overrides": overrides,
+        "recorded_gestures": {GESTURES[c]: int(n) for c, n in zip(*np.unique(recorded, return_counts=True))},
+        "replayed_gestures": {GESTURES[c]: int(n) for c, n in zip(*np.unique(replayed, return_counts=True))},
+        "recorded_events": int(np.minimum(log.records["event_count"][args.start:stop], 255).sum()),
+        "replayed_events": int(event_counts.sum()),
+        "actions": dict(actions),
+        "changed_frames": len(changed),
+        "triggers": trigger_metrics(raw, fired, log.times[args.start:stop], args.reference_window),
+    }
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    for i in changed[:args.diff]:
+        frame = args.start + int(i)
+        print(f"frame {frame} t={log.times[frame]:.3f}: recorded {GESTURES[recorded[i]]}, replayed {GESTURES[replayed[i]]}")
+
+
+if __name__ == "__main__":
+    main()
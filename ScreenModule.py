@@ -0,0 +1,174 @@
+import time
+
+
+class Monitor():
+    """One display in virtual desktop coordinates (the units the mouse backend moves in)"""
+    __slots__ = ("x", "y", "width", "height", "scale", "name", "primary")
+
+    def __init__(self, x, y, width, height, scale=1.0, name="", primary=False):
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.scale = scale  # DPI scale factor, physical pixels per unit
+        self.name = name
+        self.primary = primary
+
+    def contains(self, x, y):
+        return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
+
+    def clamp(self, x, y):
+        return (min(max(x, self.x), self.x + self.width - 1),
+                min(max(y, self.y), self.y + self.height - 1))
+
+    def key(self):
+        return (self.x, self.y, self.width, self.height, self.scale, self.primary)
+
+    def as_dict(self):
+        return {"x": self.x, "y": self.y, "width": self.width, "height": self.height,
+                "scale": self.scale, "name": self.name, "primary": self.primary}
+
+    def __repr__(self):
+        return f"Monitor({self.name or '?'} {self.width}x{self.height}+{self.x}+{self.y} @{self.scale}x)"
+
+
+def detect_monitors():
+    """Query the display layout: screeninfo if installed (all monitors), else autopy, else pyautogui"""
+    try:
+        import screeninfo
+
+        monitors = [Monitor(m.x, m.y, m.width, m.height, 1.0, m.name or "", bool(getattr(m, "is_primary", False)))
+                    for m in screeninfo.get_monitors()]
+        if monitors:
+            return monitors
+    except Exception:
+        pass
+    try:
+        import autopy
+
+        width, height = autopy.screen.size()
+        return [Monitor(0, 0, width, height, autopy.screen.scale(), "primary", True)]
+    except ImportError:
+        import pyautogui
+
+        width, height = pyautogui.size()
+        return [Monitor(0, 0, width, height, 1.0, "primary", True)]
+
+
+class ScreenGeometry():
+    """Cached display layout; poll() re-queries at most every refresh seconds and reports changes"""
+
+    def __init__(self, refresh=5.0, detect=detect_monitors):
+        self.refresh = refresh
+        self.detect = detect
+        self.monitors = detect()
+        self.checked = time.monotonic()
+
+    def poll(self, now=None):
+        """True when the display configuration changed since the last poll"""
+        now = time.monotonic() if now is None else now
+        if now - self.checked < self.refresh:
+            return False
+        self.checked = now
+        monitors = self.detect()
+        if [m.key() for m in monitors] == [m.key() for m in self.monitors]:
+            return False
+        self.monitors = monitors
+        return True
+
+    def size(self):
+        """Width and height of the bounding box of all monitors"""
+        return bounds(self.monitors)[2:]
+
+
+def primary_index(monitors):
+    """Index of the primary monitor: flagged by the OS, else the one at the origin, else the first"""
+    for i, m in enumerate(monitors):
+        if m.primary:
+            return i
+    for i, m in enumerate(monitors):
+        if m.contains(0, 0):
+            return i
+    return 0
+
+
+def bounds(monitors):
+    x0 = min(m.x for m in monitors)
+    y0 = min(m.y for m in monitors)
+    x1 = max(m.x + m.width for m in monitors)
+    y1 = max(m.y + m.height for m in monitors)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def power_curve(gamma):
+    """Acceleration curve on [0, 1], symmetric about the center: gamma > 1 is finer near the center"""
+    def curve(u):
+        d = 2 * u - 1
+        return 0.5 + 0.5 * (abs(d) ** gamma if d >= 0 else -(abs(d) ** gamma))
+    return curve
+
+
+class ScreenMapper():
+    """Camera active region -> screen coordinates, precomputed so each call is plain float arithmetic
+
+    Linear mapping is one multiply-add per axis. With an acceleration curve, the curve is baked into a
+    lookup table with one entry per camera pixel.
+    """
+
+    def __init__(self, wCam, hCam, frameR, frameR_top, monitors, target=None, acceleration=None):
+        self.monitors = list(monitors)
+        self.target = target  # None: span all monitors, int: one monitor, "primary": the primary monitor
+        if target == "primary":
+            target = primary_index(self.monitors)
+        if target is None:
+            ox, oy, width, height = bounds(self.monitors)
+        else:
+            m = self.monitors[target]
+            ox, oy, width, height = m.x, m.y, m.width, m.height
+
+        # Same mapping as np.interp(x, (frameR, wCam - frameR), (0, width - 1)), including clamping:
+        # the far edge lands on the last pixel, as in Monitor.clamp, not one past it
+        self.x0, self.x1 = frameR, wCam - frameR
+        self.y0, self.y1 = frameR_top, hCam - frameR
+        self.ox, self.oy = ox, oy
+        self.sx = (width - 1) / max(1, self.x1 - self.x0)
+        self.sy = (height - 1) / max(1, self.y1 - self.y0)
+        self.width, self.height = width, height
+
+        # Only a multi-monitor span can contain holes that need clamping to a real monitor
+        self.clampMonitors = target is None and len(self.monitors) > 1 and not self.covers()
+
+        self.lutX = self.lutY = None
+        if acceleration is not None:
+            curve = power_curve(acceleration) if isinstance(acceleration, (int, float)) else acceleration
+            self.lutX = [ox + (width - 1) * curve(min(max((x - self.x0) / (self.x1 - self.x0), 0.0), 1.0))
+                         for x in range(wCam + 1)]
+            self.lutY = [oy + (height - 1) * curve(min(max((y - self.y0) / (self.y1 - self.y0), 0.0), 1.0))
+                         for y in range(hCam + 1)]
+            self.lastX, self.lastY = wCam, hCam
+
+    def covers(self):
+        """True when the monitors tile their bounding box without gaps"""
+        x0, y0, width, height = bounds(self.monitors)
+        return sum(m.width * m.height for m in self.monitors) >= width * height
+
+    def map(self, x, y):
+        if self.lutX is not None:
+            sx = self.lutX[min(max(int(x), 0), self.lastX)]
+            sy = self.lutY[min(max(int(y), 0), self.lastY)]
+        else:
+            sx = self.ox + (min(max(x, self.x0), self.x1) - self.x0) * self.sx
+            sy = self.oy + (min(max(y, self.y0), self.y1) - self.y0) * self.sy
+        if self.clampMonitors:
+            return self.clamp(sx, sy)
+        return sx, sy
+
+    def clamp(self, x, y):
+        """Move a point in a gap between monitors onto the nearest monitor"""
+        best, bestDist = None, None
+        for m in self.monitors:
+            if m.contains(x, y):
+                return x, y
+            cx, cy = m.clamp(x, y)
+            dist = (cx - x) ** 2 + (cy - y) ** 2
+            if bestDist is None or dist < bestDist:
+                best, bestDist = (cx, cy), dist
+        return best
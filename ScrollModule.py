@@ -0,0 +1,93 @@
+import threading
+import time
+
+
+class ScrollEngine():
+    """Turns a scroll velocity (units/s) into wheel deltas sent at a fixed, capped rate
+
+    Fractional deltas accumulate between sends, so the scrolled distance depends only on velocity and
+    time, not on the frame rate. After start() a background timer sends; without it, call tick(now)
+    once per frame (recording replay and benchmarks do, with frame timestamps).
+    """
+
+    def __init__(self, submit, rate=30.0, max_velocity=3000.0, smooth=False):
+        self.submit = submit
+        self.interval = 1.0 / rate  # at most this many scroll calls per second
+        self.max_velocity = max_velocity
+        self.smooth = smooth  # send fractional deltas (high-resolution wheel), else whole units only
+        self.velocity = 0.0
+        self.accumulated = 0.0  # scrolled but not yet sent
+        self.lastUpdate = None
+        self.lastSend = float("-inf")
+        self.realtime = False  # True once the timer thread runs; timestamps then come from its clock
+        self.running = False
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stats = {"sends": 0, "units": 0.0}
+
+    def clock(self, now):
+        return time.monotonic() if self.realtime or now is None else now
+
+    def integrate(self, now):
+        if self.lastUpdate is not None and self.velocity:
+            self.accumulated += self.velocity * max(0.0, now - self.lastUpdate)
+        self.lastUpdate = now
+
+    def set_velocity(self, velocity, now=None):
+        """Scroll up (positive) or down (negative) at velocity units per second; 0 stops"""
+        velocity = max(-self.max_velocity, min(self.max_velocity, velocity))
+        with self.cond:
+            now = self.clock(now)
+            self.integrate(now)
+            if velocity * self.velocity < 0:
+                self.accumulated = 0.0  # reversing drops what was still pending in the old direction
+            self.velocity = velocity
+            if velocity:
+                self.cond.notify()
+
+    def stop_scrolling(self, now=None):
+        self.set_velocity(0.0, now)
+
+    def tick(self, now=None):
+        """Send the accumulated delta if the rate cap allows; returns the amount sent"""
+        with self.cond:
+            now = self.clock(now)
+            if now - self.lastSend < self.interval:
+                return 0
+            self.integrate(now)
+            amount = self.accumulated if self.smooth else float(int(self.accumulated))
+            if not self.velocity:
+                self.accumulated = amount  # stopped: send the whole units, drop the remainder below one
+            if not amount:
+                return 0
+            self.accumulated -= amount
+            self.lastSend = now
+            self.stats["sends"] += 1
+            self.stats["units"] += abs(amount)
+        self.submit("scroll", amount if self.smooth else int(amount))
+        return amount
+
+    def start(self):
+        self.realtime = True
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="scroll", daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.running and not self.velocity and abs(self.accumulated) < 1:
+                    self.accumulated = 0.0
+                    self.cond.wait()  # idle while not scrolling: no timer wake-ups
+                if not self.running:
+                    return
+            self.tick()
+            time.sleep(self.interval)
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
@@ -0,0 +1,162 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Pipeline stages in display order
+STAGES = ["capture", "color", "inference", "landmarks", "gestures", "actuation", "render", "loop"]
+
+
+class RollingHistogram():
+    """Keeps the last N samples of one metric and reports percentiles over them"""
+
+    def __init__(self, size=600):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {"count": self.count}
+        values = np.fromiter(self.samples, dtype=np.float64, count=len(self.samples)) * 1000
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        return {
+            "count": self.count,
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        }
+
+
+class Telemetry():
+    """Thread-safe per-stage timers with rolling p50/p95/p99 histograms"""
+
+    def __init__(self, window=600):
+        self.window = window
+        self.histograms = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def snapshot(self):
+        with self.lock:
+            names = sorted(self.histograms, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s))
+            stages = {name: self.histograms[name].summary() for name in names}
+            gauges = dict(self.gauges)
+        return {"timestamp": time.time(), "uptime_s": round(time.time() - self.started, 1),
+                "stages": stages, "gauges": gauges}
+
+    def overlay_lines(self):
+        """Short per-stage lines for the HUD"""
+        lines = []
+        for name, summary in self.snapshot()["stages"].items():
+            if "p50_ms" in summary:
+                lines.append(f"{name:<10}{summary['p50_ms']:6.1f}{summary['p95_ms']:6.1f}{summary['p99_ms']:6.1f}")
+        return lines
+
+
+class JsonDumper(threading.Thread):
+    """Writes the telemetry snapshot to a JSON file every interval seconds"""
+
+    def __init__(self, telemetry, path, interval=5.0):
+        super().__init__(name="telemetry-json", daemon=True)
+        self.telemetry = telemetry
+        self.path = path
+        self.interval = interval
+        self.stopEvent = threading.Event()
+
+    def run(self):
+        while not self.stopEvent.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        # Write then rename, so readers never see a half-written file
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.telemetry.snapshot(), f, indent=2)
+        os.replace(tmp, self.path)
+
+    def stop(self):
+        self.stopEvent.set()
+        self.dump()
+
+
+class TelemetryServer():
+    """Serves the telemetry snapshot as JSON on http://127.0.0.1:<port>/metrics"""
+
+    def __init__(self, telemetry, port=8765, host="127.0.0.1"):
+        telemetry_ref = telemetry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(telemetry_ref.snapshot()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep request logs out of the console
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="telemetry-http", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def setup_logging(name="virtual_mouse", level=logging.INFO):
+    """Logger whose records are formatted and printed on a background thread, so logging never blocks"""
+    records = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S"))
+    listener = logging.handlers.QueueListener(records, console)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    logger.handlers[:] = [logging.handlers.QueueHandler(records)]
+    listener.start()
+    return logger, listener
@@ -1,19 +1,66 @@
+import time
+startup_start = time.perf_counter()  # everything below counts towards startup time
+
+import argparse
 import cv2
-import numpy as np
 import HandTrackingModule as htm
-import time
-import autopy
-import math
-from collections import deque
-import pyautogui  # For scroll functionality
+import PipelineModule as plm
+import FilterModule as flm
+import HudModule as hudm
+import GestureModule as gm
+import InputModule as im
+import TelemetryModule as tlm
+import RecordingModule as rcm
+import GovernorModule as gvm
+import signal
+import ScreenModule as scm
+import ScrollModule as scrm
+from concurrent.futures import ThreadPoolExecutor
+
+# Command line options
+parser = argparse.ArgumentParser(description="Hand gesture controlled virtual mouse")
+parser.add_argument("--no-hud", action="store_true", help="skip all overlay drawing on the preview")
+parser.add_argument("--no-preview", action="store_true",
+                    help="run without a preview window (Ctrl+C to quit); landmarks are mirrored instead of frames")
+parser.add_argument("--input-backend", default="autopy", choices=sorted(im.BACKENDS),
+                    help="mouse output backend ('record' only logs events, for testing)")
+parser.add_argument("--telemetry-overlay", action="store_true", help="show per-stage p50/p95/p99 on the preview")
+parser.add_argument("--telemetry-json", metavar="PATH", help="periodically dump per-stage timings to this JSON file")
+parser.add_argument("--telemetry-port", type=int, metavar="PORT",
+                    help="serve per-stage timings at http://127.0.0.1:PORT/metrics")
+parser.add_argument("--telemetry-interval", type=float, default=5.0, help="seconds between JSON dumps")
+parser.add_argument("--camera-size", type=int, nargs=2, default=(640, 480), metavar=("W", "H"),
+                    help="capture resolution; gestures scale with the hand, so lower it to save CPU")
+parser.add_argument("--record", metavar="PATH",
+                    help="log landmarks, gestures and input events to a session file for RecordingModule.py replay")
+args = parser.parse_args()
+startup_times = {"imports": time.perf_counter() - startup_start}
+
+# Per-stage timings and a logger that prints on a background thread
+telemetry = tlm.Telemetry()
+logger, log_listener = tlm.setup_logging()
 
 # Parameters
-wCam, hCam = 640, 480
-frameR = 80  # Frame Reduction (reduced for better coverage)
-frameR_top = 30  # MOVED UP - Reduced from 50 to 30 for better bottom corner access
-smoothening = 7
+wCam, hCam = args.camera_size
+frame_margin = 0.125  # Detection border, fraction of the capture width (80px at 640x480)
+frame_margin_top = 0.0625  # Top border, fraction of the capture height (30px at 640x480)
+frameR = round(frame_margin * wCam)  # Frame Reduction (reduced for better coverage)
+frameR_top = round(frame_margin_top * hCam)  # MOVED UP - Reduced for better bottom corner access
+cursor_filter_kind = "one_euro"  # "one_euro", "kalman" or "ema"
+cursor_filter_params = {"min_cutoff": 1.0, "beta": 0.01}  # Hz at rest, cutoff gain per px/s
 scroll_sensitivity = 3  # Reduced for finer control
-scroll_threshold = 75  # Distance threshold for scroll activation
+scroll_threshold = 0.75  # Index-middle distance for scroll activation, in hand scales (wrist to middle MCP)
+scroll_rate = 12  # Scroll calls per second at most, each batching the units since the last; speed is in units/s
+scroll_gain = 150  # Scroll units/s per % the hand is outside the deadzone
+scroll_min_speed = 60  # Scroll units/s right next to the deadzone
+roi_tracking = True  # Run detection on a crop around the last hand position when possible
+adaptive_skipping = True  # Skip inference on still hands and extrapolate landmarks in between
+max_skip = 3  # Run inference at least every 3rd frame
+max_prediction_time = 0.12  # Never extrapolate more than 120ms past the last inference
+target_fps = 30  # Frames per second forwarded to inference at the top capture tier
+resolution_governor = True  # Step down to lower capture tiers when latency or CPU load is over budget
+screen_target = None  # None: the hand's area spans all monitors; 0, 1, ... or "primary": map onto one monitor
+cursor_acceleration = None  # None for linear mapping; e.g. 1.5 for finer control near the center
 
 # SCROLL DEADZONE PARAMETERS
 scroll_deadzone_center = 50  # Center position (50% of scroll bar)
@@ -21,379 +68,282 @@ scroll_deadzone_range = 10  # ±10% deadzone (40-60% range)
 scroll_deadzone_min = scroll_deadzone_center - scroll_deadzone_range  # 40%
 scroll_deadzone_max = scroll_deadzone_center + scroll_deadzone_range  # 60%
 
+# Pipeline queue sizes (drop-oldest, so latency stays bounded by the slowest stage)
+capture_queue_size = 1  # Keep only the newest camera frame
+result_queue_size = 1
+
 # Timing and smoothing variables
 pTime = 0
-plocX, plocY = 0, 0
-clocX, clocY = 0, 0
-
-# Scroll tracking variables
-scroll_start_y = 0
-scroll_active = False
-scroll_position = 50  # Start at center (50%)
-scroll_history = deque(maxlen=5)  # For smoothing scroll direction
-virtual_scroll_y = 0  # Virtual Y position for scroll control
-
-# Click prevention timers
-last_left_click = 0
-last_right_click = 0
-last_double_click = 0
-click_cooldown = 0.3  # 300ms cooldown between clicks
-
-# Drag state tracking
-drag_active = False
-drag_start_pos = None
-
-# Set up the webcam
-cap = cv2.VideoCapture(0)
-cap.set(3, wCam)
-cap.set(4, hCam)
-
-# Initialize the hand detector
-detector = htm.handDetector(maxHands=1)
-wScr, hScr = autopy.screen.size()
-print("Screen size:", wScr, hScr)
+cursor_filter = flm.PointFilter(cursor_filter_kind, **cursor_filter_params)
+click_cooldown = 0.3  # 300ms cooldown between clicks (only without temporal voting)
+# Temporal voting: a gesture acts only after winning 3 of the last 5 confident frames, so a single
+# noisy frame never clicks; clicks then fire once per gesture, with no cooldown
+temporal_voting = True
+gesture_voting = {"window": 5, "votes": 3, "release": 2,
+                  "min_confidence": 0.8,  # handedness score below this: the frame does not vote
+                  "latency_budget": 0.1}  # seconds voting may delay a gesture (cursor movement: only out of a drag)
+
+# Capture tiers from --camera-size down to half resolution; the capture thread applies them.
+# Recorded sessions keep one resolution, so the governor is off while recording.
+capture_tiers = gvm.make_tiers(wCam, hCam, target_fps)
+governor = None
+if resolution_governor and not args.record:
+    governor = gvm.ResolutionGovernor(capture_tiers)
+
+
+def open_camera():
+    start = time.perf_counter()
+    camera = cv2.VideoCapture(0)
+    startup_times["camera"] = time.perf_counter() - start
+    return camera
+
+
+def build_detector():
+    """Import mediapipe, build the hand graphs and warm them up on a blank frame"""
+    start = time.perf_counter()
+    hand_detector = htm.handDetector(maxHands=1, roi=roi_tracking, adaptive=adaptive_skipping,
+                                     maxSkip=max_skip, maxPredictionTime=max_prediction_time,
+                                     mirror=args.no_preview)
+    # The constructor defers mediapipe; import it and build the graphs here so "detector" covers them
+    hand_detector.createHands()
+    if roi_tracking:
+        hand_detector.createRoiHands()
+    startup_times["detector"] = time.perf_counter() - start
+    hand_detector.warmup(wCam, hCam)
+    startup_times["warmup"] = time.perf_counter() - start - startup_times["detector"]
+    return hand_detector
+
+
+# Open the webcam and build the hand detector in parallel; both mostly wait outside the GIL
+with ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup") as startup_pool:
+    camera_future = startup_pool.submit(open_camera)
+    detector_future = startup_pool.submit(build_detector)
+    cap = camera_future.result()
+    detector = detector_future.result()
+
+# HUD with cached static layers; --no-hud (or --no-preview) skips drawing completely
+hud = hudm.Hud(wCam, hCam, frameR, frameR_top, scroll_deadzone_min, scroll_deadzone_max,
+               enabled=not (args.no_hud or args.no_preview))
+
+# Display layout, cached and re-queried every few seconds to follow monitor changes
+screen_geometry = scm.ScreenGeometry()
+wScr, hScr = screen_geometry.size()
+print("Screen size:", wScr, hScr, screen_geometry.monitors)
 print("Enhanced Virtual Mouse Started!")
 print("Controls:")
 print("- Index finger: Move cursor")
-print("- Index + Middle VERY close (<25px): Left click")
+print("- Index + Middle VERY close (<0.25 hand scale): Left click")
 print("- Thumb + Middle close: Right click")
 print("- Index + Middle + Ring close: Double click")
-print("- Index + Middle MEDIUM close (25-50px): Smart Scroll with Deadzone")
+print(f"- Index + Middle MEDIUM close (0.35-{scroll_threshold} hand scale): Smart Scroll with Deadzone")
 print("- Index + Thumb close: Drag and Drop")
 print("- Press 'q' to quit")
 print(f"- Scroll Deadzone: {scroll_deadzone_min}%-{scroll_deadzone_max}% (no movement)")
 
 
-def calculate_distance(point1, point2):
-    """Calculate Euclidean distance between two points"""
-    return math.sqrt((point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2)
-
-
-def draw_scroll_bar(img, scroll_pos):
-    """Draw an enhanced scroll position indicator with deadzone visualization"""
-    bar_x = wCam - 35  # Moved further from edge for better visibility
-    bar_y_start = 100  # Moved down to avoid overlapping with controls
-    bar_height = 300  # Increased height for better precision
-    bar_width = 20  # Increased width
-
-    # Draw background bar
-    cv2.rectangle(img, (bar_x, bar_y_start), (bar_x + bar_width, bar_y_start + bar_height),
-                  (60, 60, 60), -1)
-
-    # Draw deadzone area (40-60% range)
-    deadzone_start = int((scroll_deadzone_min / 100) * bar_height)
-    deadzone_end = int((scroll_deadzone_max / 100) * bar_height)
-    cv2.rectangle(img, (bar_x, bar_y_start + deadzone_start),
-                  (bar_x + bar_width, bar_y_start + deadzone_end),
-                  (0, 100, 100), -1)  # Dark yellow for deadzone
-
-    # Draw border
-    cv2.rectangle(img, (bar_x, bar_y_start), (bar_x + bar_width, bar_y_start + bar_height),
-                  (255, 255, 255), 2)
-
-    # Draw current position indicator
-    pos_height = int((scroll_pos / 100) * bar_height)
-    indicator_size = 15
-    cv2.rectangle(img, (bar_x - 2, bar_y_start + pos_height - indicator_size // 2),
-                  (bar_x + bar_width + 2, bar_y_start + pos_height + indicator_size // 2),
-                  (0, 255, 0), -1)
-
-    # Add percentage text
-    cv2.putText(img, f"{int(scroll_pos)}%", (bar_x - 45, bar_y_start + pos_height + 5),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-    # Add deadzone label
-    cv2.putText(img, "DEAD", (bar_x - 45, bar_y_start + deadzone_start + 10),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 150, 150), 1)
-    cv2.putText(img, "ZONE", (bar_x - 45, bar_y_start + deadzone_start + 22),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 150, 150), 1)
-
-
-def draw_controls_guide(img):
-    """Draw enhanced controls guide with better visibility"""
-    # Create semi-transparent overlay - positioned to not interfere with detection area
-    overlay = img.copy()
-
-    # Background rectangle for better text visibility (moved position)
-    cv2.rectangle(overlay, (5, 5), (350, 220), (0, 0, 0), -1)
-    cv2.addWeighted(overlay, 0.7, img, 0.3, 0, img)
-
-    # Title
-    cv2.putText(img, "ENHANCED HAND GESTURE CONTROLS", (10, 25),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-    # Control instructions with color coding
-    controls = [
-        ("Index Finger: Move Cursor", (0, 255, 255)),  # Yellow
-        ("Index + Middle VERY Close: Left Click", (0, 255, 0)),  # Green
-        ("Thumb + Middle Close: Right Click", (0, 100, 255)),  # Orange
-        ("Index + Middle + Ring: Double Click", (255, 0, 255)),  # Magenta
-        ("Index + Middle MEDIUM: Smart Scroll", (100, 255, 100)),  # Light Green
-        ("  - Deadzone (40-60%): No Movement", (0, 150, 150)),  # Dark Cyan
-        ("  - <40%: Scroll UP (faster near 0%)", (100, 255, 100)),
-        ("  - >60%: Scroll DOWN (faster near 100%)", (100, 255, 100)),
-        ("Index + Thumb: Drag & Drop", (255, 255, 0)),  # Cyan
-        ("Press 'q' to Quit", (255, 255, 255))  # White
-    ]
-
-    y_offset = 45
-    for i, (text, color) in enumerate(controls):
-        cv2.putText(img, text, (10, y_offset + i * 16),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.35, color, 1)
-
-
 def log_action(action, details=""):
-    """Log actions with timestamp"""
-    timestamp = time.strftime("%H:%M:%S", time.localtime())
-    print(f"[{timestamp}] {action} {details}")
-
-
-def perform_smart_scroll(scroll_position):
-    """Perform smart scroll with deadzone and variable speed"""
-    global last_scroll_time
-
-    current_time = time.time()
-
-    # Check if we're in the deadzone
-    if scroll_deadzone_min <= scroll_position <= scroll_deadzone_max:
-        return "deadzone"  # No scrolling in deadzone
-
-    # Calculate scroll speed based on distance from deadzone
-    if scroll_position < scroll_deadzone_min:  # Scroll UP
-        # Distance from deadzone determines speed (0% = fastest, 40% = slowest)
-        distance_from_center = scroll_deadzone_min - scroll_position
-        scroll_speed = max(2, int(distance_from_center*5))  # 1-4 scroll units
-
-        try:
-            pyautogui.scroll(scroll_speed)
-            log_action("SCROLL UP", f"Speed: {scroll_speed}, Pos: {scroll_position:.1f}%")
-            return "up"
-        except Exception as e:
-            log_action("SCROLL ERROR", str(e))
-
-    elif scroll_position > scroll_deadzone_max:  # Scroll DOWN
-        # Distance from deadzone determines speed (60% = slowest, 100% = fastest)
-        distance_from_center = scroll_position - scroll_deadzone_max
-        scroll_speed = max(2, int(distance_from_center*5))  # 1-4 scroll units
-
-        try:
-            pyautogui.scroll(-scroll_speed)
-            log_action("SCROLL DOWN", f"Speed: {scroll_speed}, Pos: {scroll_position:.1f}%")
-            return "down"
-        except Exception as e:
-            log_action("SCROLL ERROR", str(e))
-
-    return "none"
-
+    """Log actions with timestamp (formatted and printed by the log listener thread)"""
+    logger.info(f"{action} {details}")
+
+
+def report_startup():
+    """Log startup phases (imports, camera, detector, warmup, ready, first frame, first cursor move)"""
+    log_action("STARTUP", ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in startup_times.items()))
+    for name, seconds in startup_times.items():
+        telemetry.set_gauge(f"startup_{name}_ms", round(seconds * 1000, 1))
+
+
+def draw_gesture_feedback(img, gesture, lmList, gestures):
+    """Draw the visual feedback for the gesture recognized this frame"""
+    thumb_tip = lmList[4][1:]  # Thumb tip
+    index_tip = lmList[8][1:]  # Index finger tip
+    middle_tip = lmList[12][1:]  # Middle finger tip
+    ring_tip = lmList[16][1:]  # Ring finger tip
+
+    if gesture == "move":
+        cv2.circle(img, index_tip, 15, (0, 255, 255), cv2.FILLED)
+        cv2.putText(img, "MOVE", (index_tip[0] + 20, index_tip[1] - 20),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+    elif gesture == "left_click":
+        cv2.circle(img, index_tip, 15, (0, 255, 0), cv2.FILLED)
+        cv2.circle(img, middle_tip, 15, (0, 255, 0), cv2.FILLED)
+        cv2.line(img, index_tip, middle_tip, (0, 255, 0), 3)
+        cv2.putText(img, "LEFT CLICK", (index_tip[0] - 50, index_tip[1] - 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+    elif gesture == "right_click":
+        cv2.circle(img, thumb_tip, 15, (0, 100, 255), cv2.FILLED)
+        cv2.circle(img, middle_tip, 15, (0, 100, 255), cv2.FILLED)
+        cv2.line(img, thumb_tip, middle_tip, (0, 100, 255), 3)
+        cv2.putText(img, "RIGHT CLICK", (thumb_tip[0] - 50, thumb_tip[1] - 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 100, 255), 2)
+
+    elif gesture == "double_click":
+        cv2.circle(img, index_tip, 12, (255, 0, 255), cv2.FILLED)
+        cv2.circle(img, middle_tip, 12, (255, 0, 255), cv2.FILLED)
+        cv2.circle(img, ring_tip, 12, (255, 0, 255), cv2.FILLED)
+        cv2.putText(img, "DOUBLE CLICK", (index_tip[0] - 60, index_tip[1] - 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
+
+    elif gesture == "scroll":
+        cv2.circle(img, index_tip, 15, (100, 255, 100), cv2.FILLED)
+        cv2.circle(img, middle_tip, 15, (100, 255, 100), cv2.FILLED)
+        cv2.line(img, index_tip, middle_tip, (100, 255, 100), 3)
+
+        # Show scroll status
+        if gestures.scroll_result == "deadzone":
+            cv2.putText(img, "SCROLL DEADZONE", (index_tip[0] - 70, index_tip[1] - 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 150, 150), 2)
+            cv2.putText(img, "NO MOVEMENT", (index_tip[0] - 60, index_tip[1] - 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 150, 150), 1)
+        elif gestures.scroll_result == "up":
+            cv2.putText(img, "SCROLL UP", (index_tip[0] - 50, index_tip[1] - 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 255, 100), 2)
+        elif gestures.scroll_result == "down":
+            cv2.putText(img, "SCROLL DOWN", (index_tip[0] - 60, index_tip[1] - 50),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 255, 100), 2)
+
+        # Show position info
+        cv2.putText(img, f"Pos: {gestures.scroll_position:.1f}%", (index_tip[0] - 50, index_tip[1] - 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    elif gesture == "drag":
+        cv2.circle(img, index_tip, 18, (255, 255, 0), cv2.FILLED)
+        cv2.circle(img, thumb_tip, 18, (255, 255, 0), cv2.FILLED)
+        cv2.line(img, index_tip, thumb_tip, (255, 255, 0), 4)
+
+        # Draw drag trail from the start position
+        cv2.line(img, gestures.drag_start_pos, index_tip, (255, 255, 0), 2)
+        cv2.putText(img, "DRAGGING", (index_tip[0] - 50, index_tip[1] - 40),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
+
+
+# Input actuation runs on its own thread; moves and scrolls are coalesced, nothing blocks the vision loop
+inputs = im.InputService(im.make_backend(args.input_backend), log=log_action, telemetry=telemetry)
+spans_monitors = screen_target is None and len(screen_geometry.monitors) > 1
+if spans_monitors and not getattr(inputs.backend, "virtual_desktop", True):
+    # This backend only reaches the main screen, so spanning every monitor would fail on each move
+    screen_target = "primary"
+    log_action("SCREEN", f"{args.input_backend} only moves on the primary monitor; mapping onto it")
+
+# Start capture, inference and actuation threads; this thread handles gestures and display
+detector.telemetry = telemetry
+pipeline = plm.Pipeline(cap, detector, inputs, flip=not args.no_preview, draw=hud.enabled,
+                        capture_depth=capture_queue_size,
+                        result_depth=result_queue_size,
+                        telemetry=telemetry)
+pipeline.configure_capture(capture_tiers[0])
+pipeline.start()
+
+# Optional telemetry outputs
+telemetry_dumper = None
+telemetry_server = None
+if args.telemetry_json:
+    telemetry_dumper = tlm.JsonDumper(telemetry, args.telemetry_json, args.telemetry_interval)
+    telemetry_dumper.start()
+if args.telemetry_port:
+    telemetry_server = tlm.TelemetryServer(telemetry, args.telemetry_port).start()
+    log_action("TELEMETRY", f"Serving http://127.0.0.1:{args.telemetry_port}/metrics")
+telemetry_lines = []
+telemetry_refresh = 0
+
+# Optional session log; every input event the gesture logic emits is stored with its frame
+submit = pipeline.submit
+recorder = None
+if args.record:
+    recorder = rcm.SessionRecorder(args.record, wCam, hCam, meta={
+        "frameR": frameR, "frameR_top": frameR_top, "wScr": wScr, "hScr": hScr,
+        "monitors": [m.as_dict() for m in screen_geometry.monitors], "screen_target": screen_target,
+        "acceleration": cursor_acceleration,
+        "cursor_filter": cursor_filter_kind, "cursor_filter_params": cursor_filter_params,
+        "click_cooldown": click_cooldown, "scroll_threshold": scroll_threshold,
+        "voting": gesture_voting if temporal_voting else None,
+        "deadzone_min": scroll_deadzone_min, "deadzone_max": scroll_deadzone_max,
+        "scroll_rate": scroll_rate, "scroll_gain": scroll_gain, "scroll_min_speed": scroll_min_speed,
+        "scroll_smooth": getattr(inputs.backend, "smooth_scroll", False)})
+    submit = recorder.wrap_submit(pipeline.submit)
+    log_action("RECORDING", f"Session log: {args.record}")
+
+# Continuous scrolling on its own timer; gestures only set the velocity
+scroll_engine = scrm.ScrollEngine(submit, rate=scroll_rate,
+                                  smooth=getattr(inputs.backend, "smooth_scroll", False)).start()
+
+# Gesture classification and click/drag/scroll state, actions go to the actuation thread
+gestures = gm.GestureStateMachine(submit, wCam, hCam, frameR, frameR_top, wScr, hScr,
+                                  cursor_filter=cursor_filter, click_cooldown=click_cooldown,
+                                  scroll_threshold=scroll_threshold,
+                                  deadzone_min=scroll_deadzone_min, deadzone_max=scroll_deadzone_max,
+                                  log=log_action, monitors=screen_geometry.monitors,
+                                  screen_target=screen_target, acceleration=cursor_acceleration,
+                                  scroll_engine=scroll_engine, scroll_gain=scroll_gain,
+                                  scroll_min_speed=scroll_min_speed,
+                                  voter=gm.GestureVoter(**gesture_voting) if temporal_voting else None)
+
+# Without a window there is no 'q' key, so Ctrl+C ends the loop and still runs the cleanup
+stop_requested = False
+if args.no_preview:
+    def request_stop(signum, frame):
+        global stop_requested
+        stop_requested = True
+    signal.signal(signal.SIGINT, request_stop)
+
+startup_times["ready"] = time.perf_counter() - startup_start
+report_startup()
 
 # Main loop
-while True:
-    success, img = cap.read()
-    if not success:
-        print("Failed to grab frame")
-        break
-
-    # Flip image horizontally for mirror effect
-    img = cv2.flip(img, 1)
-    img = detector.findHands(img)
-    lmList, bbox = detector.findPosition(img)
-
-    current_time = time.time()
-
-    # Draw the active region (frame reduction) - MOVED UP for better bottom corner access
-    cv2.rectangle(img, (frameR, frameR_top), (wCam - frameR, hCam - frameR),
-                  (255, 0, 255), 2)
-
-    # Add text to show the improved detection area
-    cv2.putText(img, "DETECTION AREA (Moved Up)", (frameR + 5, frameR_top + 20),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1)
-
-    if len(lmList) != 0:
-        # Get finger tip coordinates
-        thumb_tip = lmList[4][1:]  # Thumb tip
-        index_tip = lmList[8][1:]  # Index finger tip
-        middle_tip = lmList[12][1:]  # Middle finger tip
-        ring_tip = lmList[16][1:]  # Ring finger tip
-
-        # Check which fingers are up
-        fingers = detector.fingersUp()
-
-        # Calculate distances between fingers
-        thumb_middle_dist = calculate_distance(thumb_tip, middle_tip)
-        index_middle_dist = calculate_distance(index_tip, middle_tip)
-        index_ring_dist = calculate_distance(index_tip, ring_tip)
-        middle_ring_dist = calculate_distance(middle_tip, ring_tip)
-        thumb_index_dist = calculate_distance(thumb_tip, index_tip)
-
-        # 1. CURSOR MOVEMENT - Index finger only
-        if fingers[1] == 1 and fingers[2] == 0 and fingers[0] == 0:
-            # Convert coordinates with adjusted frame boundaries
-            x3 = np.interp(index_tip[0], (frameR, wCam - frameR), (0, wScr))
-            y3 = np.interp(index_tip[1], (frameR_top, hCam - frameR), (0, hScr))
-
-            # Smoothen values
-            clocX = plocX + (x3 - plocX) / smoothening
-            clocY = plocY + (y3 - plocY) / smoothening
-
-            # Move mouse
-            autopy.mouse.move(clocX, clocY)
-
-            # Visual feedback
-            cv2.circle(img, index_tip, 15, (0, 255, 255), cv2.FILLED)
-            cv2.putText(img, "MOVE", (index_tip[0] + 20, index_tip[1] - 20),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-
-            plocX, plocY = clocX, clocY
-            scroll_active = False
-
-        # 2. LEFT CLICK - Index + Middle finger very close (primary click)
-        elif (fingers[1] == 1 and fingers[2] == 1 and fingers[0] == 0 and fingers[3] == 0 and
-              index_middle_dist < 25):  # Very close for left click
-            if current_time - last_left_click > click_cooldown:
-                autopy.mouse.click(autopy.mouse.Button.LEFT)
-                last_left_click = current_time
-                log_action("LEFT CLICK")
-
-            # Visual feedback
-            cv2.circle(img, index_tip, 15, (0, 255, 0), cv2.FILLED)
-            cv2.circle(img, middle_tip, 15, (0, 255, 0), cv2.FILLED)
-            cv2.line(img, index_tip, middle_tip, (0, 255, 0), 3)
-            cv2.putText(img, "LEFT CLICK", (index_tip[0] - 50, index_tip[1] - 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
-        # 3. RIGHT CLICK - Thumb + Middle finger close
-        elif fingers[0] == 1 and fingers[2] == 1 and thumb_middle_dist < 40:
-            if current_time - last_right_click > click_cooldown:
-                autopy.mouse.click(autopy.mouse.Button.RIGHT)
-                last_right_click = current_time
-                log_action("RIGHT CLICK")
-
-            # Visual feedback
-            cv2.circle(img, thumb_tip, 15, (0, 100, 255), cv2.FILLED)
-            cv2.circle(img, middle_tip, 15, (0, 100, 255), cv2.FILLED)
-            cv2.line(img, thumb_tip, middle_tip, (0, 100, 255), 3)
-            cv2.putText(img, "RIGHT CLICK", (thumb_tip[0] - 50, thumb_tip[1] - 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 100, 255), 2)
-
-        # 4. DOUBLE CLICK - Index + Middle + Ring close together
-        elif (fingers[1] == 1 and fingers[2] == 1 and fingers[3] == 1 and
-              index_middle_dist < 30 and index_ring_dist < 30 and middle_ring_dist < 30):
-
-            if current_time - last_double_click > click_cooldown:
-                autopy.mouse.click(autopy.mouse.Button.LEFT)
-                time.sleep(0.1)  # Small delay between clicks
-                autopy.mouse.click(autopy.mouse.Button.LEFT)
-                last_double_click = current_time
-                log_action("DOUBLE CLICK")
-
-            # Visual feedback
-            cv2.circle(img, index_tip, 12, (255, 0, 255), cv2.FILLED)
-            cv2.circle(img, middle_tip, 12, (255, 0, 255), cv2.FILLED)
-            cv2.circle(img, ring_tip, 12, (255, 0, 255), cv2.FILLED)
-            cv2.putText(img, "DOUBLE CLICK", (index_tip[0] - 60, index_tip[1] - 40),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
-
-        # 5. SMART SCROLL MODE - Index + Middle moderately close with deadzone control
-        elif (fingers[1] == 1 and fingers[2] == 1 and fingers[0] == 0 and fingers[3] == 0 and
-              35 < index_middle_dist < scroll_threshold):  # Medium distance for scroll
-
-            # Calculate scroll position based on hand Y position
-            hand_center_y = (index_tip[1] + middle_tip[1]) // 2
-            # Map hand Y position to scroll percentage (0-100)
-            scroll_position = np.interp(hand_center_y, (frameR_top, hCam - frameR), (0, 100))
-            scroll_position = max(0, min(100, scroll_position))  # Clamp to 0-100
-
-            # Perform smart scroll with deadzone
-            scroll_result = perform_smart_scroll(scroll_position)
-
-            # Visual feedback for scroll mode
-            cv2.circle(img, index_tip, 15, (100, 255, 100), cv2.FILLED)
-            cv2.circle(img, middle_tip, 15, (100, 255, 100), cv2.FILLED)
-            cv2.line(img, index_tip, middle_tip, (100, 255, 100), 3)
-
-            # Show scroll status
-            if scroll_result == "deadzone":
-                cv2.putText(img, "SCROLL DEADZONE", (index_tip[0] - 70, index_tip[1] - 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 150, 150), 2)
-                cv2.putText(img, "NO MOVEMENT", (index_tip[0] - 60, index_tip[1] - 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 150, 150), 1)
-            elif scroll_result == "up":
-                cv2.putText(img, "SCROLL UP", (index_tip[0] - 50, index_tip[1] - 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 255, 100), 2)
-            elif scroll_result == "down":
-                cv2.putText(img, "SCROLL DOWN", (index_tip[0] - 60, index_tip[1] - 50),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (100, 255, 100), 2)
-
-            # Show position info
-            cv2.putText(img, f"Pos: {scroll_position:.1f}%", (index_tip[0] - 50, index_tip[1] - 70),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-
-            scroll_active = True
-
-        # 6. ENHANCED DRAG MODE - Index + Thumb close (for drag and drop)
-        elif fingers[1] == 1 and fingers[0] == 1 and thumb_index_dist < 35:
-            if not drag_active:
-                # Start drag - press and hold left mouse button
-                drag_active = True
-                drag_start_pos = (index_tip[0], index_tip[1])
-                # Note: autopy doesn't support holding mouse button, so we simulate with rapid clicks
-                # For proper drag functionality, you'd need a different library like pynput
-                log_action("DRAG STARTED", f"At: {drag_start_pos}")
-
-            # Visual feedback for active drag mode
-            cv2.circle(img, index_tip, 18, (255, 255, 0), cv2.FILLED)
-            cv2.circle(img, thumb_tip, 18, (255, 255, 0), cv2.FILLED)
-            cv2.line(img, index_tip, thumb_tip, (255, 255, 0), 4)
-
-            # Draw drag trail if we have a start position
-            if drag_start_pos:
-                cv2.line(img, drag_start_pos, index_tip, (255, 255, 0), 2)
-                cv2.putText(img, "DRAGGING", (index_tip[0] - 50, index_tip[1] - 40),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-
-                # Move cursor while dragging
-                x3 = np.interp(index_tip[0], (frameR, wCam - frameR), (0, wScr))
-                y3 = np.interp(index_tip[1], (frameR_top, hCam - frameR), (0, hScr))
-                autopy.mouse.move(x3, y3)
-            else:
-                cv2.putText(img, "DRAG READY", (index_tip[0] - 60, index_tip[1] - 40),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-
-        else:
-            # Reset drag mode when gesture is released
-            if drag_active:
-                drag_active = False
-                drag_start_pos = None
-                log_action("DRAG ENDED")
-
-            scroll_active = False
+while not stop_requested:
+    packet = pipeline.next_result(timeout=1.0)
+    if packet is None:
+        if not pipeline.alive():
+            for stage, error in pipeline.errors():
+                log_action("PIPELINE ERROR", f"{stage}: {error}")
+            break
+        continue
+
+    loop_start = time.perf_counter()
+    img = packet.img
+    if "first_frame" not in startup_times:
+        startup_times["first_frame"] = loop_start - startup_start
+
+    # First frame of a new capture tier: rescale the active region, cursor mapping and HUD layers
+    if img.shape[1] != wCam or img.shape[0] != hCam:
+        hCam, wCam = img.shape[:2]
+        frameR, frameR_top = round(frame_margin * wCam), round(frame_margin_top * hCam)
+        gestures.resize(wCam, hCam, frameR, frameR_top)
+        hud.resize(wCam, hCam, frameR, frameR_top)
+        log_action("RESOLUTION", f"{wCam}x{hCam}, detection border {frameR}/{frameR_top}px")
+
+    # Monitors added, removed or rescaled: rebuild the screen mapping
+    if screen_geometry.poll():
+        gestures.set_monitors(screen_geometry.monitors)
+        log_action("SCREEN", ", ".join(map(repr, screen_geometry.monitors)))
+    lmList, bbox = packet.lmList, packet.bbox
+
+    with telemetry.stage("gestures"):
+        gesture = gestures.update(lmList, packet.fingers, packet.tipDist, packet.timestamp, packet.hand)
+    if recorder is not None:
+        recorder.record(packet.timestamp, packet.landmarks, 1 if len(lmList) else 0, packet.fingers, gesture,
+                        packet.hand)
+
+    # Time to first cursor move, measured when the input thread actually moved the mouse
+    if "first_move" not in startup_times and "move" in inputs.firstExecuted:
+        startup_times["first_move"] = inputs.firstExecuted["move"] - startup_start
+        report_startup()
+
+    # Clicks and drags need real detections, not extrapolated landmarks
+    detector.forceDetect = gestures.click_in_progress or gestures.drag_active
+
+    render_start = time.perf_counter()
+    if hud.enabled and len(lmList) != 0:
+        draw_gesture_feedback(img, gesture, lmList, gestures)
 
         # Additional visual feedback for finger detection (moved to bottom right)
-        for i, finger_up in enumerate(fingers):
-            color = (0, 255, 0) if finger_up else (0, 0, 255)
-            cv2.putText(img, str(finger_up), (wCam - 150 + i * 25, hCam - 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-
-    else:
-        scroll_active = False
-        if drag_active:
-            drag_active = False
-            drag_start_pos = None
-            log_action("DRAG ENDED - Hand Lost")
-
-    # Draw enhanced scroll bar with deadzone
-    if scroll_active:
-        # Update scroll position based on current hand position
-        if len(lmList) != 0:
-            hand_center_y = (lmList[8][2] + lmList[12][2]) // 2  # Index + Middle Y
-            scroll_position = np.interp(hand_center_y, (frameR_top, hCam - frameR), (0, 100))
-            scroll_position = max(0, min(100, scroll_position))
-
-    draw_scroll_bar(img, scroll_position)
-
-    # Draw enhanced controls guide
-    draw_controls_guide(img)
+        hud.draw_fingers(img, packet.fingers)
 
+    # Cached static layers (controls guide, scroll bar, detection area), then the dynamic indicator
+    hud.draw_static(img)
+    hud.draw_scroll_indicator(img, gestures.scroll_position)
     # Calculate and display FPS
     cTime = time.time()
     if cTime - pTime != 0:
@@ -402,17 +352,72 @@ while True:
         fps = 0
     pTime = cTime
 
-    cv2.putText(img, f'FPS: {int(fps)}', (wCam - 120, 30),
-                cv2.FONT_HERSHEY_PLAIN, 2, (255, 255, 255), 2)
+    # End-to-end latency (capture -> display) and frames dropped by the pipeline queues
+    latency_ms = (time.time() - packet.timestamp) * 1000
+    dropped = pipeline.frames.dropped + pipeline.results.dropped
+    hud.draw_stats(img, fps, latency_ms, dropped)
+    telemetry.set_gauge("fps", round(fps, 1))
+    telemetry.set_gauge("latency_ms", round(latency_ms, 1))
+    telemetry.set_gauge("dropped_frames", dropped)
+
+    # Trade capture resolution and frame rate for latency when the loop falls behind
+    if governor is not None:
+        tier = governor.update(latency_ms / 1000)
+        if tier is not None:
+            pipeline.configure_capture(tier)
+            detector.roiSize = tier.roi_size
+            log_action("GOVERNOR", f"Tier {tier} (p90 latency {governor.p90 * 1000:.0f}ms, "
+                                   f"CPU {governor.cpuLoad * 100:.0f}%)")
+        telemetry.set_gauge("capture_tier", governor.tier.name)
+
+    # Per-stage percentiles, recomputed twice a second
+    if args.telemetry_overlay:
+        if cTime - telemetry_refresh > 0.5:
+            telemetry_lines = telemetry.overlay_lines()
+            telemetry_refresh = cTime
+        hud.draw_telemetry(img, telemetry_lines)
 
     # Display the image
-    cv2.imshow("Enhanced Virtual Mouse with Smart Scroll", img)
+    key = 0
+    if not args.no_preview:
+        cv2.imshow("Enhanced Virtual Mouse with Smart Scroll", img)
+        key = cv2.waitKey(1) & 0xFF
+    pipeline.release(packet)  # frame buffer goes back to the capture thread
+    telemetry.record("render", time.perf_counter() - render_start)
+    telemetry.record("loop", time.perf_counter() - loop_start)
 
     # Break loop on 'q' press
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    if key == ord('q'):
         log_action("ENHANCED VIRTUAL MOUSE STOPPED")
         break
 
 # Cleanup
+scroll_engine.stop()
+pipeline.stop()
+pipeline_stats = pipeline.stats()
+frame_pool = pipeline_stats.pop("frame_pool")
+log_action("FRAME POOL", f"Buffers allocated: {frame_pool['allocated']}, "
+                         f"frames over the FPS target: {pipeline_stats.pop('capture_skipped')}")
+for name, stats in pipeline_stats.items():
+    log_action("QUEUE", f"{name}: depth {stats['depth']}/{stats['maxsize']}, dropped {stats['dropped']}")
+log_action("INPUT", f"Submitted: {inputs.stats['submitted']}, coalesced: {inputs.stats['coalesced']}, "
+                    f"executed: {inputs.stats['executed']}, errors: {inputs.stats['errors']}")
+if gestures.voter is not None:
+    voter_stats = gestures.voter.stats
+    log_action("GESTURE VOTING", f"Frames: {voter_stats['frames']}, low confidence: {voter_stats['abstained']}, "
+                                 f"commits: {voter_stats['commits']}, overruled: {voter_stats['overruled']}")
+if roi_tracking:
+    log_action("ROI TRACKING", f"Hit rate: {detector.roiHitRate() * 100:.1f}%, "
+                               f"Re-acquisitions: {detector.roiStats['reacquisitions']}, "
+                               f"Full-frame detections: {detector.roiStats['full']}")
+if recorder is not None:
+    recorder.close()
+    log_action("RECORDING", f"{recorder.count} frames written to {args.record}")
+if telemetry_dumper is not None:
+    telemetry_dumper.stop()
+if telemetry_server is not None:
+    telemetry_server.stop()
+log_listener.stop()
 cap.release()
-cv2.destroyAllWindows()
+if not args.no_preview:
+    cv2.destroyAllWindows()